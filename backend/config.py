@@ -1,38 +1,75 @@
 import os
+import logging
+from dataclasses import dataclass
+from pathlib import Path
 from dotenv import load_dotenv
 
-# Load .env from the same directory as this config file
-basedir = os.path.dirname(os.path.abspath(__file__))
-load_dotenv(os.path.join(basedir, ".env"))
+# Resolve this file's location once; every directory constant derives from it
+CONFIG_DIR = Path(__file__).resolve().parent
+PROJECT_DIR = CONFIG_DIR.parent
 
+# Load .env from the same directory as this config file (explicit path, no parent-directory search)
+load_dotenv(CONFIG_DIR / ".env", override=False)
+
+logger = logging.getLogger(__name__)
+
+@dataclass(frozen=True, slots=True)
 class Config:
-    LLMWHISPERER_API_KEY = os.getenv("LLMWHISPERER_API_KEY")
-    if not LLMWHISPERER_API_KEY:
-        raise ValueError("LLMWHISPERER_API_KEY environment variable is not set.")
-    
-    GROQ_API_KEY = os.getenv("GROQ_API_KEY")
-    if not GROQ_API_KEY:
-        raise ValueError("GROQ_API_KEY environment variable is not set.")
-    
-    LLMWHISPERER_BASE_URL_V2 = os.getenv("LLMWHISPERER_BASE_URL_V2", "https://llmwhisperer-api.us-central.unstract.com/api/v2")
-    # Default CORS origins - include common dev ports
-    default_cors = "http://localhost:3000,http://localhost:5173,http://localhost:8080"
-    cors_env = os.getenv("CORS_ORIGINS", default_cors)
-    # Always ensure localhost:8080 is included
-    cors_list = [origin.strip() for origin in cors_env.split(",")]
-    if "http://localhost:8080" not in cors_list:
-        cors_list.append("http://localhost:8080")
-    CORS_ORIGINS = cors_list
-    print(f"[Config] CORS_ORIGINS loaded: {CORS_ORIGINS} (from env: {cors_env})")
-    BACKEND_BASE_URL = os.getenv("BACKEND_BASE_URL", "http://localhost:8005")
-    
+    LLMWHISPERER_API_KEY: str
+    GROQ_API_KEY: str
+    LLMWHISPERER_BASE_URL_V2: str
+    CORS_ORIGINS: tuple
+    BACKEND_BASE_URL: str
+
     # Input/Output directories
-    BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    INPUT_DIR = os.path.join(BASE_DIR, "input_files")
-    OUTPUT_DIR = os.path.join(BASE_DIR, "output_files")
-    
+    BASE_DIR: str
+    INPUT_DIR: str
+    OUTPUT_DIR: str
+
     # Extraction strictness mode (off by default)
     # When enabled: drops low-confidence fields, ambiguous collisions, fields outside windows
-    STRICT_EXTRACTION = os.getenv("STRICT_EXTRACTION", "false").lower() == "true"
+    STRICT_EXTRACTION: bool
+
+    # Client-side Groq rate limits (requests / estimated tokens per minute); 0 disables the limiter
+    GROQ_RPM: int
+    GROQ_TPM: int
+
+    # Upper bound on concurrent LLM calls made by a single batch structuring request
+    LLM_CONCURRENCY: int
+
+    @classmethod
+    def _build(cls) -> "Config":
+        """Read and validate environment variables once, returning the immutable settings."""
+        llmwhisperer_api_key = os.getenv("LLMWHISPERER_API_KEY")
+        if not llmwhisperer_api_key:
+            raise ValueError("LLMWHISPERER_API_KEY environment variable is not set.")
+
+        groq_api_key = os.getenv("GROQ_API_KEY")
+        if not groq_api_key:
+            raise ValueError("GROQ_API_KEY environment variable is not set.")
+
+        # Default CORS origins - include common dev ports
+        default_cors = "http://localhost:3000,http://localhost:5173,http://localhost:8080"
+        cors_env = os.getenv("CORS_ORIGINS", default_cors)
+        # Always ensure localhost:8080 is included
+        cors_list = [origin.strip() for origin in cors_env.split(",")]
+        if "http://localhost:8080" not in cors_list:
+            cors_list.append("http://localhost:8080")
+        logger.debug("[Config] CORS_ORIGINS loaded: %s (from env: %s)", cors_list, cors_env)
+
+        return cls(
+            LLMWHISPERER_API_KEY=llmwhisperer_api_key,
+            GROQ_API_KEY=groq_api_key,
+            LLMWHISPERER_BASE_URL_V2=os.getenv("LLMWHISPERER_BASE_URL_V2", "https://llmwhisperer-api.us-central.unstract.com/api/v2"),
+            CORS_ORIGINS=tuple(cors_list),
+            BACKEND_BASE_URL=os.getenv("BACKEND_BASE_URL", "http://localhost:8005"),
+            BASE_DIR=str(PROJECT_DIR),
+            INPUT_DIR=str(PROJECT_DIR / "input_files"),
+            OUTPUT_DIR=str(PROJECT_DIR / "output_files"),
+            STRICT_EXTRACTION=os.getenv("STRICT_EXTRACTION", "false").lower() == "true",
+            GROQ_RPM=int(os.getenv("GROQ_RPM", "0")),
+            GROQ_TPM=int(os.getenv("GROQ_TPM", "0")),
+            LLM_CONCURRENCY=max(1, int(os.getenv("LLM_CONCURRENCY", "8"))),
+        )
 
-config = Config()
+config = Config._build()
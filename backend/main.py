@@ -1,21 +1,62 @@
 
+import asyncio
+import importlib
+import logging
 import os
 from contextlib import asynccontextmanager
+
+# Configure logging before importing backend modules so their import-time messages are emitted
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s %(levelname)s %(name)s %(message)s",
+    handlers=[logging.StreamHandler()],
+)
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from backend.config import config
 
+logger = logging.getLogger(__name__)
+
+# Route modules registered at startup, in include order
+_ROUTERS = (
+    "backend.routes.upload",
+    "backend.routes.retrieve",
+    "backend.routes.highlight",
+    "backend.routes.status",
+    "backend.routes.document",
+    "backend.routes.structure",
+    "backend.routes.admin",
+    "backend.routes.keys",
+    "backend.routes.export",
+)
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Ensure input/output directories exist on startup
     os.makedirs(config.INPUT_DIR, exist_ok=True)
     os.makedirs(config.OUTPUT_DIR, exist_ok=True)
+
+    # Route modules pull in the LLM/HTTP SDKs, so import them here (in parallel) instead of at module load.
+    # include_router mutates the app, so registration stays sequential once imports finish.
+    modules = await asyncio.gather(*(asyncio.to_thread(importlib.import_module, name) for name in _ROUTERS))
+    for module in modules:
+        app.include_router(module.router)
+
+    # Finish deleting trees an earlier reset moved aside, without holding up startup
+    from backend.routes.admin import sweep_trash_dirs
+    sweep_task = asyncio.create_task(asyncio.to_thread(sweep_trash_dirs))
     yield
 
+    # Release pooled upstream connections
+    from backend.services.whisper_client import whisper_client
+    await whisper_client.aclose()
+    await sweep_task
+
 app = FastAPI(lifespan=lifespan)
 
 # CORS Configuration
-print(f"[CORS] Allowed origins: {config.CORS_ORIGINS}")
+logger.info("[CORS] Allowed origins: %s", config.CORS_ORIGINS)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=config.CORS_ORIGINS,
@@ -28,19 +69,3 @@ app.add_middleware(
 @app.get("/health")
 async def health_check():
     return {"status": "ok"}
-
-from backend.routes import upload, retrieve, highlight, status, document, structure
-
-app.include_router(upload.router)
-app.include_router(retrieve.router)
-app.include_router(highlight.router)
-app.include_router(status.router)
-app.include_router(document.router)
-app.include_router(structure.router)
-from backend.routes import admin, keys
-app.include_router(admin.router)
-app.include_router(keys.router)
-
-from backend.routes import export
-app.include_router(export.router)
-
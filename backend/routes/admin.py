@@ -1,43 +1,124 @@
-
+import asyncio
+import glob
+import logging
 import os
 import shutil
-from fastapi import APIRouter, HTTPException
+import uuid
+from typing import Optional
+from fastapi import APIRouter, BackgroundTasks, HTTPException
 from backend.config import config
+from backend.services.file_store import file_store
+from backend.routes.status import clear_status_cache
+from backend.services.line_table import clear_line_table_cache
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/admin", tags=["admin"])
 
+
+def _purge_dir(dir_path: str):
+    """
+    Deletes every entry inside dir_path, leaving the directory itself in place.
+    Uses os.scandir so file type checks come from the cached DirEntry data
+    instead of a separate stat per entry.
+    """
+    if not os.path.exists(dir_path):
+        return
+
+    def _on_rmtree_error(func, path, exc_info):
+        # Entry vanished or is locked mid-walk - nothing more to do for it
+        logger.warning("[Admin] Failed to delete %s. Reason: %s", path, exc_info[1])
+
+    with os.scandir(dir_path) as it:
+        entries = list(it)
+
+    # Visit entries in inode order to reduce seeking on cold caches / spinning disks
+    try:
+        entries.sort(key=lambda e: e.inode())
+    except OSError:
+        pass  # Filesystems without stable inode numbers keep directory order
+
+    for entry in entries:
+        try:
+            if entry.is_symlink() or not entry.is_dir(follow_symlinks=False):
+                os.unlink(entry.path)
+            else:
+                shutil.rmtree(entry.path, onerror=_on_rmtree_error)
+        except Exception as e:
+            logger.warning("[Admin] Failed to delete %s. Reason: %s", entry.path, e)
+
+
+def _trash_path(dir_path: str) -> str:
+    """Sibling path a directory is renamed to before being deleted in the background."""
+    return f"{dir_path}.trash.{uuid.uuid4().hex}"
+
+
+def sweep_trash_dirs():
+    """
+    Deletes trash directories left behind when a background delete after a reset
+    was interrupted (e.g. the server stopped before it finished).
+    """
+    for dir_path in (config.OUTPUT_DIR, config.INPUT_DIR):
+        for trash_path in glob.glob(f"{glob.escape(dir_path)}.trash.*"):
+            logger.info("[Admin] Removing leftover %s", trash_path)
+            shutil.rmtree(trash_path, ignore_errors=True)
+
+
+def _reset_dir(dir_path: str) -> Optional[str]:
+    """
+    Empties dir_path with as little work as possible before the response is sent.
+
+    - Already empty (or missing): nothing is written.
+    - Otherwise the whole tree is renamed aside and an empty directory recreated,
+      which is O(1) regardless of tree size. Returns the renamed path so the caller
+      can delete it after responding.
+    - If the rename fails (e.g. dir_path is a mount point), falls back to _purge_dir.
+    """
+    if not os.path.isdir(dir_path):
+        os.makedirs(dir_path, exist_ok=True)
+        return None
+
+    with os.scandir(dir_path) as it:
+        if next(it, None) is None:
+            return None
+
+    trash_path = _trash_path(dir_path)
+    try:
+        os.rename(dir_path, trash_path)
+    except OSError as e:
+        logger.warning("[Admin] Could not move %s aside (%s); deleting entries in place", dir_path, e)
+        _purge_dir(dir_path)
+        return None
+
+    os.makedirs(dir_path, exist_ok=True)
+    return trash_path
+
+
 @router.post("/reset")
-async def reset_session():
+async def reset_session(background_tasks: BackgroundTasks):
     """
     Resets the session by deleting all files in input_files and output_files.
     """
     try:
-        # Clear output_files
-        if os.path.exists(config.OUTPUT_DIR):
-            for filename in os.listdir(config.OUTPUT_DIR):
-                file_path = os.path.join(config.OUTPUT_DIR, filename)
-                try:
-                    if os.path.isfile(file_path) or os.path.islink(file_path):
-                        os.unlink(file_path)
-                    elif os.path.isdir(file_path):
-                        shutil.rmtree(file_path)
-                except Exception as e:
-                    print(f"[Admin] Failed to delete {file_path}. Reason: {e}")
-
-        # Clear input_files
-        if os.path.exists(config.INPUT_DIR):
-            for filename in os.listdir(config.INPUT_DIR):
-                file_path = os.path.join(config.INPUT_DIR, filename)
-                try:
-                    if os.path.isfile(file_path) or os.path.islink(file_path):
-                        os.unlink(file_path)
-                    elif os.path.isdir(file_path):
-                        shutil.rmtree(file_path)
-                except Exception as e:
-                    print(f"[Admin] Failed to delete {file_path}. Reason: {e}")
-                    
+        # Both trees are cleared on worker threads so the event loop keeps serving requests
+        trash_paths = await asyncio.gather(
+            asyncio.to_thread(_reset_dir, config.OUTPUT_DIR),
+            asyncio.to_thread(_reset_dir, config.INPUT_DIR),
+        )
+        # OUTPUT_DIR may now be a new directory; stop writing through the old descriptor
+        file_store.reset_output_dir_fd()
+        # Cached /status responses refer to jobs whose files are now gone
+        clear_status_cache()
+        # Cached line tables map files from the old tree
+        clear_line_table_cache()
+
+        # Old trees are removed after the response has been sent
+        for trash_path in trash_paths:
+            if trash_path:
+                background_tasks.add_task(shutil.rmtree, trash_path, ignore_errors=True)
+
         return {"status": "success", "message": "Session reset successfully"}
-        
+
     except Exception as e:
-        print(f"[Admin] Error resetting session: {e}")
+        logger.error("[Admin] Error resetting session: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
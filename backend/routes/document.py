@@ -1,22 +1,25 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request, Response
 from fastapi.responses import FileResponse
+import mimetypes
 from backend.services.file_store import file_store
 import os
 
 router = APIRouter()
 
 @router.get("/document/{whisper_hash}")
-async def get_document(whisper_hash: str):
+async def get_document(whisper_hash: str, request: Request):
     """
     Serves the raw input file associated with the whisper_hash.
     Looks up the local_file_path from the _initial.json metadata.
+    Emits ETag/Last-Modified so browsers can revalidate with a 304 instead of re-downloading,
+    advertises byte ranges, and serves the pre-compressed sidecar when the client accepts gzip.
     """
     # Load initial metadata
-    initial_data = file_store.get_json_output(whisper_hash, suffix="_initial")
+    initial_data = await file_store.get_json_output(whisper_hash, suffix="_initial")
     if not initial_data:
         # Fallback: check _status in case it was saved there? 
         # But we saved to both _initial and _status in upload.py.
-        initial_data = file_store.get_json_output(whisper_hash, suffix="_status")
+        initial_data = await file_store.get_json_output(whisper_hash, suffix="_status")
         
     if not initial_data:
         raise HTTPException(status_code=404, detail="Document metadata not found")
@@ -28,7 +31,47 @@ async def get_document(whisper_hash: str):
         # But UUID makes it hard.
         raise HTTPException(status_code=404, detail="File path not found in metadata")
 
-    if not os.path.exists(file_path):
+    try:
+        st = os.stat(file_path)
+    except FileNotFoundError:
         raise HTTPException(status_code=404, detail="File not found on server")
 
-    return FileResponse(file_path, filename=initial_data.get("original_filename", "document"))
+    filename = initial_data.get("original_filename", "document")
+    if file_path.lower().endswith(".pdf"):
+        media_type = "application/pdf"
+    else:
+        media_type = mimetypes.guess_type(file_path)[0]
+
+    # Prefer the gzip sidecar written at upload time for text-like documents
+    serve_path = file_path
+    content_encoding = None
+    if "gzip" in request.headers.get("accept-encoding", ""):
+        gz_path = file_store.gzip_sidecar_path(file_path)
+        try:
+            st = os.stat(gz_path)
+            serve_path = gz_path
+            content_encoding = "gzip"
+        except FileNotFoundError:
+            pass
+
+    etag = f'"{st.st_size:x}-{st.st_mtime_ns:x}"'
+    cache_headers = {
+        "ETag": etag,
+        "Cache-Control": "private, max-age=3600",
+        "Accept-Ranges": "bytes",
+        "Vary": "Accept-Encoding",
+    }
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=cache_headers)
+
+    if content_encoding:
+        cache_headers["Content-Encoding"] = content_encoding
+
+    # Pass the stat result through so FileResponse doesn't stat the file again
+    return FileResponse(
+        serve_path,
+        filename=filename,
+        media_type=media_type,
+        headers=cache_headers,
+        stat_result=st,
+    )
@@ -40,11 +40,12 @@ async def save_export_result(request: ExportRequest):
         payload = {
             "whisper_hash": request.whisper_hash,
             "total_items": len(request.items),
-            "items": [item.dict() for item in request.items]
+            # Serialize the whole item list in one pydantic-core pass
+            "items": request.model_dump(mode="json")["items"]
         }
         
         # Save using file_store
-        saved_path = file_store.save_json_output(request.whisper_hash, payload, suffix="_final_result")
+        saved_path = await file_store.save_json_output(request.whisper_hash, payload, suffix="_final_result")
         
         return {"status": "success", "path": saved_path, "message": "Export saved successfully"}
         
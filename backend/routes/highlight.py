@@ -1,6 +1,9 @@
 
+import asyncio
+
 from fastapi import APIRouter, HTTPException, Query
 from backend.services.file_store import file_store
+from backend.services import line_table
 
 router = APIRouter()
 
@@ -44,19 +47,37 @@ async def get_highlight(
     target_width: int = Query(..., description="Width of the target image/viewport"),
     target_height: int = Query(..., description="Height of the target image/viewport")
 ):
-    # 1. Load extraction JSON
-    data = file_store.get_json_output(whisper_hash, suffix="")
-    if not data:
-        raise HTTPException(status_code=404, detail="Result not found")
-        
-    # 2. Get line metadata
-    # The structure of line_metadata is a list of objects.
-    line_metadata = data.get("line_metadata")
-    if not line_metadata or line >= len(line_metadata):
+    # 1. Load line metadata - prefer the memory-mapped lookup table over parsing the extraction JSON
+    table = line_table.load_line_table(whisper_hash)
+    line_metadata = None
+    if table is None:
+        data = await file_store.get_json_output(whisper_hash, suffix="")
+        if not data:
+            raise HTTPException(status_code=404, detail="Result not found")
+
+        # 2. Get line metadata
+        # The structure of line_metadata is a list of objects.
+        line_metadata = data.get("line_metadata")
+        # Build the lookup table now so this and subsequent highlights skip the JSON,
+        # unless a concurrent request already built it while the JSON was loading
+        table = line_table.load_line_table(whisper_hash)
+        if table is None:
+            await asyncio.to_thread(line_table.save_line_table, whisper_hash, line_metadata)
+            table = line_table.load_line_table(whisper_hash)
+
+    if table is not None:
+        num_lines = len(table)
+        get_line_item = lambda idx: line_table.row_to_raw(table[idx])
+    else:
+        # NumPy unavailable - index the parsed JSON directly
+        num_lines = len(line_metadata) if line_metadata else 0
+        get_line_item = lambda idx: line_metadata[idx]
+
+    if not num_lines or line >= num_lines:
         raise HTTPException(status_code=400, detail="Invalid line index")
         
     # 3. Get the target line
-    line_item = line_metadata[line]
+    line_item = get_line_item(line)
     
     # Validation: Check format
     if not line_item or not isinstance(line_item, list) or len(line_item) < 4:
@@ -67,28 +88,34 @@ async def get_highlight(
         # Valid line - return immediately
         return _get_line_coordinates(line_item, target_width, target_height)
     
-    # 5. Self-Healing: Check neighbors if target line is invalid
+    # 5. Self-Healing: Use the nearest valid line on the same page
     target_page = line_item[0] if len(line_item) > 0 else None
+
+    if table is not None:
+        # Vectorized search over cached per-page valid line indices (any distance, not just +/-1)
+        nearest = line_table.nearest_valid_line(whisper_hash, table, target_page, line)
+        if nearest is not None:
+            return _get_line_coordinates(get_line_item(nearest), target_width, target_height)
+    else:
+        # Check previous line (line - 1)
+        if line > 0:
+            prev_item = get_line_item(line - 1)
+            if (isinstance(prev_item, list) and len(prev_item) >= 4 and 
+                _is_valid_line_metadata(prev_item) and 
+                prev_item[0] == target_page):
+                # Neighbor is valid and on same page - return neighbor's coordinates
+                return _get_line_coordinates(prev_item, target_width, target_height)
+        
+        # Check next line (line + 1)
+        if line + 1 < num_lines:
+            next_item = get_line_item(line + 1)
+            if (isinstance(next_item, list) and len(next_item) >= 4 and 
+                _is_valid_line_metadata(next_item) and 
+                next_item[0] == target_page):
+                # Neighbor is valid and on same page - return neighbor's coordinates
+                return _get_line_coordinates(next_item, target_width, target_height)
     
-    # Check previous line (line - 1)
-    if line > 0:
-        prev_item = line_metadata[line - 1]
-        if (isinstance(prev_item, list) and len(prev_item) >= 4 and 
-            _is_valid_line_metadata(prev_item) and 
-            prev_item[0] == target_page):
-            # Neighbor is valid and on same page - return neighbor's coordinates
-            return _get_line_coordinates(prev_item, target_width, target_height)
-    
-    # Check next line (line + 1)
-    if line + 1 < len(line_metadata):
-        next_item = line_metadata[line + 1]
-        if (isinstance(next_item, list) and len(next_item) >= 4 and 
-            _is_valid_line_metadata(next_item) and 
-            next_item[0] == target_page):
-            # Neighbor is valid and on same page - return neighbor's coordinates
-            return _get_line_coordinates(next_item, target_width, target_height)
-    
-    # 6. Fallback: Return dummy/empty highlight (zeros) if neighbors are also invalid
+    # 6. Fallback: Return dummy/empty highlight (zeros) if no valid line exists on the page
     return {
         "page": target_page if target_page is not None else 0,
         "x1": 0,
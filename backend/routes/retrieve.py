@@ -1,14 +1,22 @@
 
+import asyncio
+
 from fastapi import APIRouter, HTTPException, Query
 from backend.services.file_store import file_store
 from backend.services.whisper_client import whisper_client
+from backend.services import line_table
 
 router = APIRouter()
 
 @router.get("/retrieve")
 async def retrieve_result(whisper_hash: str = Query(..., description="The unique hash of the processed file")):
+    # 0. Fast path: the filtered view is written once at cache fill and never changes afterwards
+    filtered = await file_store.get_json_output(whisper_hash, suffix="_filtered")
+    if filtered:
+        return filtered
+
     # 1. Check if result already exists locally (Cache Hit)
-    data = file_store.get_json_output(whisper_hash, suffix="")
+    data = await file_store.get_json_output(whisper_hash, suffix="")
     
     if not data:
         # 2. If not found, Call LLMWhisperer API (V2 Retrieve)
@@ -18,15 +26,17 @@ async def retrieve_result(whisper_hash: str = Query(..., description="The unique
            # 3. Save result locally (Cache Fill)
            # The user rule: "Extraction can only be retrieved ONCE."
            # Saving it ensures we don't call API again.
-           file_store.save_json_output(whisper_hash, data, suffix="")
+           await file_store.save_json_output(whisper_hash, data, suffix="")
+           await asyncio.to_thread(line_table.save_line_table, whisper_hash, data.get("line_metadata"))
            
            # 4. Update initial status to 'retrieved' or 'processed'
            # We update the status file to reflect we have the result.
            # Try updating _status.json first as it's the active one
-           status_data = file_store.get_json_output(whisper_hash, suffix="_status")
+           status_data = await file_store.get_json_output(whisper_hash, suffix="_status")
            if status_data:
-               status_data["status"] = "retrieved"
-               file_store.save_json_output(whisper_hash, status_data, suffix="_status")
+               # Copy first: the cached dict is shared with concurrent readers until the save lands
+               status_data = {**status_data, "status": "retrieved"}
+               await file_store.save_json_output(whisper_hash, status_data, suffix="_status")
                
         except Exception as e:
             # If API fails or 404, propagate error
@@ -35,7 +45,7 @@ async def retrieve_result(whisper_hash: str = Query(..., description="The unique
     # 5. Save raw text output as .txt file (runs for both cache hits and API fetches)
     result_text = data.get("result_text")
     if result_text:
-        file_store.save_text_output(whisper_hash, result_text)
+        await file_store.save_text_output(whisper_hash, result_text)
 
     # 6. Return filtered response
     # Ensure specific fields are returned as requested
@@ -46,5 +56,8 @@ async def retrieve_result(whisper_hash: str = Query(..., description="The unique
         "metadata": data.get("metadata"),
         "whisper_hash": whisper_hash # good practice to include
     }
+
+    # Persist the shaped payload so repeat retrievals skip the full result JSON
+    await file_store.save_json_output(whisper_hash, filtered_response, suffix="_filtered")
     
     return filtered_response
@@ -1,3 +1,8 @@
+import asyncio
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Dict, List
 
 from fastapi import APIRouter, HTTPException, Query
 from backend.services.file_store import file_store
@@ -5,37 +10,107 @@ from backend.services.whisper_client import whisper_client
 
 router = APIRouter()
 
+# Upstream status responses are reused for a short window so per-second pollers
+# for the same hash share one LLMWhisperer call and one disk write.
+STATUS_CACHE_TTL_SECONDS = 1.0
+# hash -> (fetched_at, api_status), oldest first so expired entries are pruned from the front
+_status_cache: "OrderedDict[str, tuple]" = OrderedDict()
+# hash -> [lock, number of pollers holding or waiting on it]; removed when the count drops to 0
+_status_locks: Dict[str, List] = {}
+
+
+def clear_status_cache():
+    """Forget cached upstream statuses (e.g. after a session reset)."""
+    _status_cache.clear()
+
+
+def _store_status(whisper_hash: str, api_status: dict):
+    now = time.monotonic()
+    _status_cache.pop(whisper_hash, None)
+    _status_cache[whisper_hash] = (now, api_status)
+    # Entries are in fetch order, so everything expired sits at the front
+    while _status_cache:
+        fetched_at = next(iter(_status_cache.values()))[0]
+        if now - fetched_at < STATUS_CACHE_TTL_SECONDS:
+            break
+        _status_cache.popitem(last=False)
+
+
+@asynccontextmanager
+async def _hash_lock(whisper_hash: str):
+    """Per-hash lock that is discarded once no poller holds or waits on it."""
+    entry = _status_locks.get(whisper_hash)
+    if entry is None:
+        entry = _status_locks[whisper_hash] = [asyncio.Lock(), 0]
+    entry[1] += 1
+    try:
+        async with entry[0]:
+            yield
+    finally:
+        entry[1] -= 1
+        if entry[1] == 0:
+            del _status_locks[whisper_hash]
+
+
+def _shape_status(api_status: dict, whisper_hash: str) -> dict:
+    return {
+        "status": api_status.get("status"),
+        "detail": api_status.get("message"), # 'message' often contains detail like 'Whisper Job Processing'
+        "whisper_hash": whisper_hash
+    }
+
+
+def _fresh_cached_status(whisper_hash: str):
+    entry = _status_cache.get(whisper_hash)
+    if entry is None:
+        return None
+    if time.monotonic() - entry[0] < STATUS_CACHE_TTL_SECONDS:
+        return entry[1]
+    del _status_cache[whisper_hash]
+    return None
+
+
 @router.get("/status")
 async def get_status(whisper_hash: str = Query(..., description="The unique hash to check status for")):
+    # 0. Serve a recent upstream response without touching disk or the API
+    cached = _fresh_cached_status(whisper_hash)
+    if cached is not None:
+        return _shape_status(cached, whisper_hash)
+
     # 1. Load initial status file
-    initial_status = file_store.get_json_output(whisper_hash, suffix="_initial")
-    
+    initial_status = await file_store.get_json_output(whisper_hash, suffix="_initial")
+
     if not initial_status:
         raise HTTPException(status_code=404, detail="Job not found (initial status missing)")
-    
+
     try:
-        # 2. Call LLMWhisperer Status API active polling
-        api_status = await whisper_client.get_status(whisper_hash)
-        
-        # 3. Save updated status locally
-        file_store.save_json_output(whisper_hash, api_status, suffix="_status")
-        
+        async with _hash_lock(whisper_hash):
+            # Another poller may have refreshed the entry while we waited for the lock
+            cached = _fresh_cached_status(whisper_hash)
+            if cached is not None:
+                return _shape_status(cached, whisper_hash)
+
+            # 2. Call LLMWhisperer Status API active polling
+            api_status = await whisper_client.get_status(whisper_hash)
+            _store_status(whisper_hash, api_status)
+
+            # 3. Save updated status locally, only when it actually changed
+            existing_status = await file_store.get_json_output(whisper_hash, suffix="_status")
+            if existing_status != api_status:
+                await file_store.save_json_output(whisper_hash, api_status, suffix="_status")
+
         # 4. Return to frontend
-        return {
-            "status": api_status.get("status"),
-            "detail": api_status.get("message"), # 'message' often contains detail like 'Whisper Job Processing'
-            "whisper_hash": whisper_hash
-        }
+        return _shape_status(api_status, whisper_hash)
     except Exception as e:
         # In case of API error, return the last known status or error
         # We might want to read the local _status file if it exists as fallback
-        existing_status = file_store.get_json_output(whisper_hash, suffix="_status")
+        existing_status = await file_store.get_json_output(whisper_hash, suffix="_status")
         if existing_status:
              return {
                  "status": existing_status.get("status"),
                  "detail": "Using cached status due to API error",
                  "whisper_hash": whisper_hash
              }
-        
+
         # If active polling fails and no cache, return error
         raise HTTPException(status_code=502, detail=f"Failed to fetch status from upstream: {str(e)}")
@@ -1,12 +1,97 @@
-from fastapi import APIRouter, HTTPException
+import asyncio
+import functools
+import hashlib
+import logging
+
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 
+from backend.config import config
 from backend.services.file_store import file_store
 from backend.services.llm_service import llm_service
 from backend.services.st_table_builder import build_st_rows
+from backend.services import line_table
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
+
+# Bump when the shape of the structured payload changes so cached outputs are regenerated
+STRUCTURED_SCHEMA_VERSION = 1
+
+
+# Sanitize model_id for filenames (e.g. "groq/llama-3" -> "groq_llama-3")
+_MODEL_ID_SANITIZER = str.maketrans({"/": "_", ":": "", " ": "_"})
+
+
+@functools.lru_cache(maxsize=64)
+def _output_suffixes(model_id: Optional[str]) -> Tuple[str, str, str]:
+    """(structured, st, st_debug) file suffixes for a model; the default model uses the bare suffixes."""
+    if not model_id:
+        return "_structured", "_st", "_st_debug"
+    safe_model_id = model_id.translate(_MODEL_ID_SANITIZER)
+    return f"_structured_{safe_model_id}", f"_st_{safe_model_id}", f"_st_debug_{safe_model_id}"
+
+
+def _structure_input_hash(raw_text: str, model_id: Optional[str]) -> str:
+    """
+    Content hash of the extraction input, used to skip re-running the LLM on unchanged text.
+    The system prompt's fingerprint is part of the input, so editing the prompt invalidates cached outputs.
+    """
+    hasher = hashlib.blake2b(digest_size=32)
+    hasher.update((model_id or "").encode("utf-8"))
+    hasher.update(b"\0")
+    hasher.update(llm_service.system_prompt_hash.encode("ascii"))
+    hasher.update(b"\0")
+    hasher.update(raw_text.encode("utf-8"))
+    return hasher.hexdigest()
+
+
+async def _save_structured_outputs(
+    whisper_hash: str,
+    output_payload: Dict[str, Any],
+    items: List[Dict[str, Any]],
+    suffix_base: str = "_structured",
+    st_suffix_base: str = "_st",
+    debug_suffix_base: str = "_st_debug",
+):
+    """
+    Save the structured payload together with its ST rows and debug info.
+    The three files are independent, so they are written concurrently; a failure
+    building or saving the ST outputs is logged without failing the main save.
+    """
+    saves = [file_store.save_json_output(whisper_hash, output_payload, suffix=suffix_base)]
+
+    # Build ST-style rows for downstream table construction (CPU-bound, so off the event loop)
+    try:
+        st_rows, debug_info = await asyncio.to_thread(build_st_rows, items, debug=True)
+        st_payload = {
+            "whisper_hash": whisper_hash,
+            "rows": st_rows,
+        }
+        # Debug info for troubleshooting
+        debug_payload = {
+            "whisper_hash": whisper_hash,
+            "debug_info": debug_info,
+        }
+        # ST rows and debug info are only read back by the API, so skip pretty-printing them
+        saves.append(
+            file_store.save_json_output(whisper_hash, st_payload, suffix=st_suffix_base, indent=False)
+        )
+        saves.append(
+            file_store.save_json_output(whisper_hash, debug_payload, suffix=debug_suffix_base, indent=False)
+        )
+    except Exception as exc:
+        # Do not fail the main structuring endpoint if ST building has issues
+        logger.warning("Failed to build ST rows for %s: %s", whisper_hash, exc)
+
+    main_result, *st_results = await asyncio.gather(*saves, return_exceptions=True)
+    if isinstance(main_result, BaseException):
+        raise main_result
+    for result in st_results:
+        if isinstance(result, BaseException):
+            logger.warning("Failed to save ST rows for %s: %s", whisper_hash, result)
 
 
 class StructuredItemUpdate(BaseModel):
@@ -21,18 +106,64 @@ class StructuredDataUpdate(BaseModel):
     items: List[StructuredItemUpdate]
 
 
+class StructureBatchRequest(BaseModel):
+    hashes: List[str]
+    model_id: Optional[str] = None
+    save: bool = True
+    force: bool = False
+
+
 @router.get("/structure/{whisper_hash}")
-async def get_structured_document(whisper_hash: str):
-    """Retrieve existing structured data without re-running extraction."""
-    structured_data = file_store.get_json_output(whisper_hash, suffix="_structured")
-    if structured_data:
-        return structured_data
+async def get_structured_document(whisper_hash: str, request: Request):
+    """
+    Retrieve existing structured data without re-running extraction.
+    Uses the file mtime as a weak ETag so unchanged polls get an empty 304.
+    """
+    mtime_ns = file_store.get_json_output_mtime_ns(whisper_hash, suffix="_structured")
+    if mtime_ns is not None:
+        etag = f'W/"{mtime_ns:x}"'
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers={"ETag": etag})
+
+        structured_data = await file_store.get_json_output(whisper_hash, suffix="_structured")
+        if structured_data:
+            return JSONResponse(structured_data, headers={"ETag": etag, "Cache-Control": "no-cache"})
     raise HTTPException(status_code=404, detail="Structured data not found")
 
 
+# Registered before POST /structure/{whisper_hash} so "batch" isn't captured as a hash
+@router.post("/structure/batch")
+async def structure_batch(request: StructureBatchRequest):
+    """
+    Structure several documents in one request.
+    Documents are processed concurrently (bounded by config.LLM_CONCURRENCY);
+    a failure for one hash is reported in its result entry instead of failing the batch.
+    """
+    semaphore = asyncio.Semaphore(config.LLM_CONCURRENCY)
+
+    async def run_one(whisper_hash: str) -> Dict[str, Any]:
+        async with semaphore:
+            try:
+                return await structure_document(
+                    whisper_hash, model_id=request.model_id, save=request.save, force=request.force
+                )
+            except HTTPException as exc:
+                return {"whisper_hash": whisper_hash, "status_code": exc.status_code, "error": exc.detail}
+            except Exception as exc:
+                # Anything else (e.g. a malformed stored file or a failed save) is also this hash's error only
+                logger.exception("Failed to structure %s in batch", whisper_hash)
+                return {"whisper_hash": whisper_hash, "status_code": 500, "error": f"Failed to structure document: {exc}"}
+
+    # dict.fromkeys drops duplicate hashes while keeping request order
+    results = await asyncio.gather(*(run_one(h) for h in dict.fromkeys(request.hashes)))
+    return {"results": results}
+
+
 @router.post("/structure/{whisper_hash}")
-async def structure_document(whisper_hash: str, model_id: Optional[str] = None, save: bool = True):
-    stored = file_store.get_json_output(whisper_hash, suffix="")
+async def structure_document(
+    whisper_hash: str, model_id: Optional[str] = None, save: bool = True, force: bool = False
+):
+    stored = await file_store.get_json_output(whisper_hash, suffix="")
     if not stored:
         raise HTTPException(status_code=404, detail="Whisper result not found")
 
@@ -43,6 +174,20 @@ async def structure_document(whisper_hash: str, model_id: Optional[str] = None,
             status_code=400, detail="Missing result_text or line_metadata for this hash"
         )
 
+    # Determine suffix based on model_id to avoid overwriting main file during comparisons
+    suffix_base, st_suffix_base, debug_suffix_base = _output_suffixes(model_id)
+
+    # Reuse the previous structuring when the input text (and schema) hasn't changed
+    input_hash = _structure_input_hash(raw_text, model_id)
+    if not force:
+        existing = await file_store.get_json_output(whisper_hash, suffix=suffix_base)
+        if (
+            existing
+            and existing.get("input_hash") == input_hash
+            and existing.get("schema_version") == STRUCTURED_SCHEMA_VERSION
+        ):
+            return existing
+
     try:
         structured = await llm_service.structure_document(raw_text, line_metadata, model_id=model_id)
     except Exception as exc:
@@ -58,45 +203,18 @@ async def structure_document(whisper_hash: str, model_id: Optional[str] = None,
         "whisper_hash": whisper_hash,
         "items": items,  # Flat array of all extracted items
         "metadata": stored.get("metadata"),
+        "input_hash": input_hash,
+        "schema_version": STRUCTURED_SCHEMA_VERSION,
     }
 
     if save:
-        # Determine suffix based on model_id to avoid overwriting main file during comparisons
-        suffix_base = "_structured"
-        st_suffix_base = "_st"
-        debug_suffix_base = "_st_debug"
-        
-        if model_id:
-            # Sanitize model_id for filename (e.g. "groq/llama-3" -> "groq_llama-3")
-            safe_model_id = model_id.replace("/", "_").replace(":", "").replace(" ", "_")
-            suffix_base = f"_structured_{safe_model_id}"
-            st_suffix_base = f"_st_{safe_model_id}"
-            debug_suffix_base = f"_st_debug_{safe_model_id}"
-
-        # Save flat structured data
-        file_store.save_json_output(whisper_hash, output_payload, suffix=suffix_base)
-
-        # Build and save ST-style rows for downstream table construction
-        try:
-            st_rows, debug_info = build_st_rows(items, debug=True)
-            st_payload = {
-                "whisper_hash": whisper_hash,
-                "rows": st_rows,
-            }
-            file_store.save_json_output(whisper_hash, st_payload, suffix=st_suffix_base)
-            
-            # Save debug info for troubleshooting
-            debug_payload = {
-                "whisper_hash": whisper_hash,
-                "debug_info": debug_info,
-            }
-            file_store.save_json_output(whisper_hash, debug_payload, suffix=debug_suffix_base)
-        except Exception as exc:
-            # Do not fail the main structuring endpoint if ST building has issues
-            import logging
-            logging.getLogger(__name__).warning(
-                "Failed to build ST rows for %s: %s", whisper_hash, exc
-            )
+        # Refresh the highlight lookup table alongside the structured output
+        await asyncio.to_thread(line_table.save_line_table, whisper_hash, line_metadata)
+
+        # Save flat structured data plus ST rows/debug info
+        await _save_structured_outputs(
+            whisper_hash, output_payload, items, suffix_base, st_suffix_base, debug_suffix_base
+        )
 
     return output_payload
 
@@ -105,12 +223,12 @@ async def structure_document(whisper_hash: str, model_id: Optional[str] = None,
 async def update_structured_document(whisper_hash: str, data: StructuredDataUpdate):
     """Update existing structured data with edited values."""
     # Get existing structured data to preserve metadata
-    existing_data = file_store.get_json_output(whisper_hash, suffix="_structured")
+    existing_data = await file_store.get_json_output(whisper_hash, suffix="_structured")
     if not existing_data:
         raise HTTPException(status_code=404, detail="Structured data not found")
     
-    # Convert Pydantic models to dicts
-    items_dict = [item.dict() for item in data.items]
+    # Convert Pydantic models to dicts in a single pass over the payload
+    items_dict = data.model_dump()["items"]
     
     # Update payload with edited items
     output_payload = {
@@ -119,28 +237,8 @@ async def update_structured_document(whisper_hash: str, data: StructuredDataUpda
         "metadata": existing_data.get("metadata"),
     }
     
-    # Save updated structured data
-    file_store.save_json_output(whisper_hash, output_payload, suffix="_structured")
-    
-    # Rebuild ST rows with updated items
-    try:
-        st_rows, debug_info = build_st_rows(items_dict, debug=True)
-        st_payload = {
-            "whisper_hash": whisper_hash,
-            "rows": st_rows,
-        }
-        file_store.save_json_output(whisper_hash, st_payload, suffix="_st")
-        
-        debug_payload = {
-            "whisper_hash": whisper_hash,
-            "debug_info": debug_info,
-        }
-        file_store.save_json_output(whisper_hash, debug_payload, suffix="_st_debug")
-    except Exception as exc:
-        import logging
-        logging.getLogger(__name__).warning(
-            "Failed to rebuild ST rows after update for %s: %s", whisper_hash, exc
-        )
+    # Save updated structured data and rebuild ST rows with updated items
+    await _save_structured_outputs(whisper_hash, output_payload, items_dict)
     
     return output_payload
 
@@ -148,14 +246,14 @@ async def update_structured_document(whisper_hash: str, data: StructuredDataUpda
 @router.get("/structure/{whisper_hash}/st")
 async def get_st_rows(whisper_hash: str):
     """Retrieve ST rows (table data)."""
-    st_data = file_store.get_json_output(whisper_hash, suffix="_st")
+    st_data = await file_store.get_json_output(whisper_hash, suffix="_st")
     if st_data:
         return st_data
     raise HTTPException(status_code=404, detail="ST data not found")
 
 
 @router.get("/structure/{whisper_hash}/debug")
-async def get_st_debug_info(whisper_hash: str):
+async def get_st_debug_info(whisper_hash: str, rebuild: bool = False):
     """
     Retrieve ST table debug information for troubleshooting.
     
@@ -164,13 +262,18 @@ async def get_st_debug_info(whisper_hash: str):
     - Which items couldn't be mapped to ST fields
     - Validation issues found
     - Per-row assignment details
+
+    The debug file is written alongside the ST rows by POST/PUT; pass rebuild=true
+    to regenerate it from the structured data instead.
     """
-    debug_data = file_store.get_json_output(whisper_hash, suffix="_st_debug")
-    if debug_data:
-        return debug_data
+    if not rebuild:
+        debug_data = await file_store.get_json_output(whisper_hash, suffix="_st_debug")
+        if debug_data:
+            return debug_data
+        raise HTTPException(status_code=404, detail="ST debug data not found")
     
-    # If no debug file exists, try to generate it from structured data
-    structured_data = file_store.get_json_output(whisper_hash, suffix="_structured")
+    # Regenerate from structured data
+    structured_data = await file_store.get_json_output(whisper_hash, suffix="_structured")
     if not structured_data:
         raise HTTPException(status_code=404, detail="Structured data not found")
     
@@ -179,12 +282,12 @@ async def get_st_debug_info(whisper_hash: str):
         raise HTTPException(status_code=404, detail="No items found in structured data")
     
     try:
-        st_rows, debug_info = build_st_rows(items, debug=True)
+        st_rows, debug_info = await asyncio.to_thread(build_st_rows, items, debug=True)
         debug_payload = {
             "whisper_hash": whisper_hash,
             "debug_info": debug_info,
         }
-        file_store.save_json_output(whisper_hash, debug_payload, suffix="_st_debug")
+        await file_store.save_json_output(whisper_hash, debug_payload, suffix="_st_debug", indent=False)
         return debug_payload
     except Exception as exc:
         raise HTTPException(
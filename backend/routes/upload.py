@@ -3,6 +3,7 @@ from fastapi import APIRouter, UploadFile, File, HTTPException, Query
 from backend.services.file_store import file_store
 from backend.services.whisper_client import whisper_client
 from backend.services.mode_selector import select_mode
+import asyncio
 import os
 
 router = APIRouter()
@@ -17,21 +18,28 @@ async def upload_file(
         
     try:
         # 1. Save locally with UUID
-        file_path = await file_store.save_input_file(file.filename, await file.read())
+        file_path = await file_store.save_input_file(file.filename, file)
+        # Pre-compress text-like sources off the event loop so /document can serve gzip directly
+        await asyncio.to_thread(file_store.save_gzip_sidecar, file_path)
         
         # Determine mode using helper
         mode = select_mode(file_path, user_override=mode)
         
         # 2. Call LLMWhisperer API
         response = await whisper_client.upload_file(file_path, mode=mode)
-        
-        whisper_hash = response.get("whisper_hash")
-        if not whisper_hash:
-             whisper_hash = response.get("id")
-             
-        if not whisper_hash:
-            raise HTTPException(status_code=500, detail="Failed to get whisper_hash from API")
-            
+    except Exception as e:
+        # Log error in real app
+        raise HTTPException(status_code=500, detail=str(e))
+
+    # Checked outside the try so this error isn't caught and re-wrapped by the generic handler
+    whisper_hash = response.get("whisper_hash")
+    if not whisper_hash:
+         whisper_hash = response.get("id")
+         
+    if not whisper_hash:
+        raise HTTPException(status_code=500, detail="Failed to get whisper_hash from API")
+
+    try:
         # 3. Create Status Object
         status_data = {
             "file_path": file_path,
@@ -43,17 +51,16 @@ async def upload_file(
         }
         
         # 4. Persist initial status
-        file_store.save_json_output(whisper_hash, status_data, suffix="_initial")
-        # Also save as _status for compatibility with retrieve endpoints?
-        # User requested _initial.json specifically.
-        # But retrieval logic looks for _status. Let's save both or update retrieve logic.
-        # The user req says: "Save a JSON metadata file in: ./output_files/<whisper_hash>_initial.json"
-        # But previous retrieve logic looked for _status. 
-        # I should output _initial.json AS REQUESTED, but I should probably also save it as _status 
-        # so my Retrieve endpoint works without modification, OR update retrieve logic.
-        # To be safe and compliant with "Do NOT store anything in DB", file is DB.
-        # Let's save as _status as well to keep the system working cohesively.
-        file_store.save_json_output(whisper_hash, status_data, suffix="_status")
+        # _initial keeps the upload metadata (document lookup, job existence); _status starts
+        # as the same payload and is later replaced by /status polling. Output writes swap in
+        # a new file with os.replace rather than rewriting in place, so _initial can be a
+        # hardlink to _status and keeps the original content when _status is replaced.
+        await file_store.save_json_output(whisper_hash, status_data, suffix="_status")
+        try:
+            file_store.link_json_output(whisper_hash, "_status", "_initial")
+        except OSError:
+            # Filesystem without hardlink support - write the second copy instead
+            await file_store.save_json_output(whisper_hash, status_data, suffix="_initial")
         
         return {
             "whisper_hash": whisper_hash,
@@ -1,9 +1,13 @@
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
 
 router = APIRouter()
 
+# Built once; every call gets the same 410 without raising and handling an HTTPException
+_GONE = JSONResponse(status_code=410, content={"detail": "Webhook is deprecated. Use polling workflow."})
+
 @router.post("/webhook/llmwhisperer")
 async def webhook_llmwhisperer():
     # Deprecated for pure polling workflow
-    raise HTTPException(status_code=410, detail="Webhook is deprecated. Use polling workflow.")
+    return _GONE
@@ -1,57 +1,302 @@
 
 import os
-import json
+import errno
+import gzip
+import shutil
+import mimetypes
+import orjson
 import aiofiles
+from collections import OrderedDict
 from backend.config import config
 
 import uuid
+from typing import Optional
+
+# Parsed JSON outputs keyed by file path -> ((mtime_ns, size), data).
+# Entries are revalidated with a single os.stat, so files edited outside the app are re-read;
+# size is part of the key because coarse-mtime filesystems can leave mtime unchanged on a rewrite.
+# The cache is bounded by the on-disk size of the cached files (parsed dicts are a few times larger),
+# and files above the per-entry limit - full whisper results and their _filtered views - are never cached.
+_JSON_CACHE_MAX_BYTES = 32 << 20
+_JSON_CACHE_MAX_ENTRY_BYTES = 512 << 10
+_json_cache: "OrderedDict[str, tuple]" = OrderedDict()
+_json_cache_bytes = 0
+
+# Uploads are copied to disk in chunks of this size
+_UPLOAD_CHUNK_SIZE = 1 << 20
+
+# Non text/* types that still compress well enough to be worth a gzip sidecar
+_COMPRESSIBLE_MIME_TYPES = {"application/json", "application/xml", "application/csv"}
+
+# Output files are opened relative to a cached directory descriptor, which skips resolving
+# OUTPUT_DIR and the per-save makedirs. If the directory is deleted or replaced behind our back,
+# the failing operation drops the descriptor and retries once. Platforms without dir_fd
+# support (e.g. Windows) fall back to plain paths.
+_DIR_FD_SUPPORTED = hasattr(os, "O_DIRECTORY") and os.open in os.supports_dir_fd and os.stat in os.supports_dir_fd
+_output_dir_fd: Optional[int] = None
+
+
+def _cache_drop(file_path: str):
+    global _json_cache_bytes
+    entry = _json_cache.pop(file_path, None)
+    if entry is not None:
+        _json_cache_bytes -= entry[0][1]
+
+
+def _cache_put(file_path: str, version: tuple, data):
+    """Caches data for file_path (version = (mtime_ns, size)), evicting least recently used entries."""
+    global _json_cache_bytes
+    _cache_drop(file_path)
+    if version[1] > _JSON_CACHE_MAX_ENTRY_BYTES:
+        return
+    _json_cache[file_path] = (version, data)
+    _json_cache_bytes += version[1]
+    while _json_cache_bytes > _JSON_CACHE_MAX_BYTES:
+        _, (evicted_version, _) = _json_cache.popitem(last=False)
+        _json_cache_bytes -= evicted_version[1]
+
+
+def _get_output_dir_fd() -> Optional[int]:
+    global _output_dir_fd
+    if not _DIR_FD_SUPPORTED:
+        os.makedirs(config.OUTPUT_DIR, exist_ok=True)
+        return None
+    if _output_dir_fd is None:
+        os.makedirs(config.OUTPUT_DIR, exist_ok=True)
+        _output_dir_fd = os.open(config.OUTPUT_DIR, os.O_RDONLY | os.O_DIRECTORY)
+    return _output_dir_fd
+
+
+def _reset_output_dir_fd():
+    global _output_dir_fd
+    if _output_dir_fd is not None:
+        os.close(_output_dir_fd)
+        _output_dir_fd = None
+
+
+def _recover_output_dir(exc: OSError) -> bool:
+    """
+    Returns True (after dropping the cached descriptor) when exc may be caused by the held
+    OUTPUT_DIR descriptor pointing at a directory that was removed or replaced.
+    """
+    if _output_dir_fd is None or exc.errno not in (errno.ENOENT, errno.ESTALE):
+        return False
+    if exc.errno == errno.ENOENT:
+        # A plain missing file is only worth a retry if OUTPUT_DIR is no longer the held directory
+        try:
+            held = os.fstat(_output_dir_fd)
+            current = os.stat(config.OUTPUT_DIR)
+            if (held.st_dev, held.st_ino) == (current.st_dev, current.st_ino):
+                return False
+        except OSError:
+            pass
+    _reset_output_dir_fd()
+    return True
+
+
+def _output_target(filename: str):
+    """
+    Returns (full_path, open_name, opener, dir_fd) for a file in OUTPUT_DIR.
+    full_path is used for cache keys and return values; open_name/opener/dir_fd for the actual I/O.
+    """
+    file_path = os.path.join(config.OUTPUT_DIR, filename)
+    dir_fd = _get_output_dir_fd()
+    if dir_fd is None:
+        return file_path, file_path, None, None
+    opener = lambda name, flags: os.open(name, flags, 0o666, dir_fd=dir_fd)
+    return file_path, filename, opener, dir_fd
+
+
+def _stat_output(filename: str):
+    """Returns (target, stat_result or None) for a file in OUTPUT_DIR; target as from _output_target."""
+    for attempt in range(2):
+        target = _output_target(filename)
+        try:
+            return target, os.stat(target[1], dir_fd=target[3])
+        except FileNotFoundError as e:
+            if attempt == 0 and _recover_output_dir(e):
+                continue
+            return target, None
+        except OSError as e:
+            if attempt == 0 and _recover_output_dir(e):
+                continue
+            raise
+
+
+async def _write_output_atomic(filename: str, payload: bytes) -> str:
+    """
+    Writes payload to OUTPUT_DIR/filename via a temp file that is renamed into place.
+    The write spans several awaits, so writing the target directly would let concurrent
+    readers see a truncated file; os.replace makes them see either the old or the new one.
+    """
+    try:
+        return await _write_output_atomic_once(filename, payload)
+    except OSError as e:
+        if not _recover_output_dir(e):
+            raise
+    return await _write_output_atomic_once(filename, payload)
+
+
+async def _write_output_atomic_once(filename: str, payload: bytes) -> str:
+    file_path, open_name, opener, dir_fd = _output_target(filename)
+    tmp_name = f".{filename}.{uuid.uuid4().hex}.tmp"
+    tmp_open_name = tmp_name if dir_fd is not None else os.path.join(config.OUTPUT_DIR, tmp_name)
+    try:
+        async with aiofiles.open(tmp_open_name, 'wb', opener=opener) as f:
+            await f.write(payload)
+        os.replace(tmp_open_name, open_name, src_dir_fd=dir_fd, dst_dir_fd=dir_fd)
+    except BaseException:
+        try:
+            os.unlink(tmp_open_name, dir_fd=dir_fd)
+        except OSError:
+            pass
+        raise
+    return file_path
+
+
+def _link_output(src_filename: str, filename: str) -> str:
+    """
+    Makes OUTPUT_DIR/filename a hardlink to OUTPUT_DIR/src_filename, replacing any existing file.
+    Safe because outputs are only ever replaced, never rewritten in place, so a later write
+    to either name leaves the other one untouched.
+    """
+    try:
+        return _link_output_once(src_filename, filename)
+    except OSError as e:
+        if not _recover_output_dir(e):
+            raise
+    return _link_output_once(src_filename, filename)
+
+
+def _link_output_once(src_filename: str, filename: str) -> str:
+    file_path, open_name, _, dir_fd = _output_target(filename)
+    src_open_name = src_filename if dir_fd is not None else os.path.join(config.OUTPUT_DIR, src_filename)
+    tmp_name = f".{filename}.{uuid.uuid4().hex}.tmp"
+    tmp_open_name = tmp_name if dir_fd is not None else os.path.join(config.OUTPUT_DIR, tmp_name)
+    # Link under a temp name first: os.link refuses to overwrite, os.replace does it atomically
+    os.link(src_open_name, tmp_open_name, src_dir_fd=dir_fd, dst_dir_fd=dir_fd)
+    try:
+        os.replace(tmp_open_name, open_name, src_dir_fd=dir_fd, dst_dir_fd=dir_fd)
+    except BaseException:
+        try:
+            os.unlink(tmp_open_name, dir_fd=dir_fd)
+        except OSError:
+            pass
+        raise
+    return file_path
+
 
 class FileStore:
     @staticmethod
-    async def save_input_file(filename: str, content: bytes) -> str:
-        """Saves an uploaded file to the input directory with a UUID prefix."""
+    async def save_input_file(filename: str, upload) -> str:
+        """
+        Saves an uploaded file to the input directory with a UUID prefix.
+        `upload` is streamed in fixed-size chunks (anything with an async read(size), e.g. UploadFile),
+        so the whole body is never held in memory at once.
+        """
         unique_id = str(uuid.uuid4())
         safe_filename = f"{unique_id}_{filename}"
         file_path = os.path.join(config.INPUT_DIR, safe_filename)
         async with aiofiles.open(file_path, 'wb') as f:
-            await f.write(content)
+            while chunk := await upload.read(_UPLOAD_CHUNK_SIZE):
+                await f.write(chunk)
         return file_path
 
     @staticmethod
-    def save_json_output(whisper_hash: str, data: dict, suffix: str = "") -> str:
+    def gzip_sidecar_path(file_path: str) -> str:
+        """Path of the pre-compressed copy served to clients that accept gzip."""
+        return f"{file_path}.gz"
+
+    @staticmethod
+    def save_gzip_sidecar(file_path: str):
+        """
+        Writes a gzip copy next to text-like input files so downloads can be served
+        pre-compressed. Returns the sidecar path, or None for binary formats.
+        """
+        mime_type, _ = mimetypes.guess_type(file_path)
+        if not mime_type or not (mime_type.startswith("text/") or mime_type in _COMPRESSIBLE_MIME_TYPES):
+            return None
+
+        gz_path = FileStore.gzip_sidecar_path(file_path)
+        with open(file_path, 'rb') as src, gzip.open(gz_path, 'wb', compresslevel=6) as dst:
+            shutil.copyfileobj(src, dst)
+        return gz_path
+
+    @staticmethod
+    def reset_output_dir_fd():
+        """
+        Drops the cached OUTPUT_DIR descriptor. A deleted directory is detected on the next
+        failing operation, but one that was renamed aside (e.g. session reset) still accepts
+        writes, so callers that move it must reset the descriptor themselves.
+        """
+        _reset_output_dir_fd()
+
+    @staticmethod
+    async def save_json_output(whisper_hash: str, data: dict, suffix: str = "", indent: bool = True) -> str:
         """
         Saves a JSON object to the output directory.
         Suffix examples: '_status', '_result', etc.
         Final filename: output_files/<whisper_hash><suffix>.json
+        Pass indent=False for machine-consumed files to write compact JSON.
         """
         # Sanitize hash to remove invalid characters like pipe '|' sometimes sent by API
         safe_hash = whisper_hash.replace("|", "_")
         filename = f"{safe_hash}{suffix}.json"
-        file_path = os.path.join(config.OUTPUT_DIR, filename)
-        
-        # Ensure directory exists just in case
-        os.makedirs(config.OUTPUT_DIR, exist_ok=True)
-        
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2)
-        return file_path
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if indent else 0)
+        payload = orjson.dumps(data, option=option)
+
+        # Drop any cached copy before the file changes underneath it
+        _cache_drop(os.path.join(config.OUTPUT_DIR, filename))
+        return await _write_output_atomic(filename, payload)
 
     @staticmethod
-    def get_json_output(whisper_hash: str, suffix: str = "") -> dict:
-        """Retrieves a JSON object from the output directory."""
+    def link_json_output(whisper_hash: str, src_suffix: str, suffix: str) -> str:
+        """
+        Makes output_files/<whisper_hash><suffix>.json a hardlink to the existing
+        <whisper_hash><src_suffix>.json, so identical content is written only once.
+        Raises OSError where hardlinks are unsupported; callers fall back to save_json_output.
+        """
+        safe_hash = whisper_hash.replace("|", "_")
+        filename = f"{safe_hash}{suffix}.json"
+        _cache_drop(os.path.join(config.OUTPUT_DIR, filename))
+        return _link_output(f"{safe_hash}{src_suffix}.json", filename)
+
+    @staticmethod
+    def get_json_output_mtime_ns(whisper_hash: str, suffix: str = ""):
+        """Returns the mtime (ns) of a JSON output file, or None if it doesn't exist."""
+        safe_hash = whisper_hash.replace("|", "_")
+        _, st = _stat_output(f"{safe_hash}{suffix}.json")
+        return st.st_mtime_ns if st is not None else None
+
+    @staticmethod
+    async def get_json_output(whisper_hash: str, suffix: str = "") -> dict:
+        """
+        Retrieves a JSON object from the output directory.
+        Parsed results are cached in-process and reused while the file's mtime is unchanged,
+        so callers must treat the returned dict as read-only unless they save it back.
+        """
         # Sanitize input hash to match saved files
         safe_hash = whisper_hash.replace("|", "_")
         filename = f"{safe_hash}{suffix}.json"
-        file_path = os.path.join(config.OUTPUT_DIR, filename)
-        
-        if not os.path.exists(file_path):
+        (file_path, open_name, opener, _), st = _stat_output(filename)
+        if st is None:
+            _cache_drop(file_path)
             return None
+        version = (st.st_mtime_ns, st.st_size)
+
+        cached = _json_cache.get(file_path)
+        if cached is not None and cached[0] == version:
+            _json_cache.move_to_end(file_path)
+            return cached[1]
             
-        with open(file_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        async with aiofiles.open(open_name, 'rb', opener=opener) as f:
+            data = orjson.loads(await f.read())
+
+        _cache_put(file_path, version, data)
+        return data
 
     @staticmethod
-    def save_text_output(whisper_hash: str, text: str, suffix: str = "_raw_text") -> str:
+    async def save_text_output(whisper_hash: str, text: str, suffix: str = "_raw_text") -> str:
         """
         Saves a text string to the output directory.
         Suffix examples: '_raw_text', etc.
@@ -60,13 +305,6 @@ class FileStore:
         # Sanitize hash to remove invalid characters like pipe '|' sometimes sent by API
         safe_hash = whisper_hash.replace("|", "_")
         filename = f"{safe_hash}{suffix}.txt"
-        file_path = os.path.join(config.OUTPUT_DIR, filename)
-        
-        # Ensure directory exists just in case
-        os.makedirs(config.OUTPUT_DIR, exist_ok=True)
-        
-        with open(file_path, 'w', encoding='utf-8') as f:
-            f.write(text)
-        return file_path
+        return await _write_output_atomic(filename, text.encode("utf-8"))
 
 file_store = FileStore()
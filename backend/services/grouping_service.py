@@ -4,15 +4,21 @@ Semantic grouping service for organizing normalized fields into UI-friendly sect
 Groups fields into logical sections like policy_info, insured_info, claim_header, etc.
 """
 
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Dict, FrozenSet, List, Any, Optional, Tuple
 import logging
-from collections import Counter
+from array import array
+from bisect import bisect_left
+from collections import Counter, defaultdict
 
 from backend.config import config
+from backend.services.line_numbers import convert_line_number, parse_line_string
 from backend.services.metadata_service import StandardizedMetadata
 
 logger = logging.getLogger(__name__)
 
+# Page value used in the page-by-line index for lines without usable metadata
+NO_PAGE = -1
+
 
 # Field to group mapping
 # Each canonical field belongs to exactly one semantic group (no overlap)
@@ -46,6 +52,34 @@ FIELD_GROUPS: Dict[str, str] = {
     "causeOfLoss": "claim_details",
 }
 
+# Fields that belong to report_info (appear once per report)
+REPORT_LEVEL_FIELDS = frozenset({"insured", "runDate", "policyNumberHeader", "policyNumber"})
+
+# Both per-key decisions precomputed at import: canonical key -> (primary group, is report-level)
+_FIELD_ROUTING: Dict[str, Tuple[str, bool]] = {
+    key: (group, key in REPORT_LEVEL_FIELDS) for key, group in FIELD_GROUPS.items()
+}
+
+
+class ClaimRecord:
+    """
+    A claim being assembled: field values plus the line numbers each value came from.
+    Converted to the plain claim dict (fields + "_line_refs") with to_dict().
+    """
+    __slots__ = ("fields", "line_refs")
+    
+    def __init__(self):
+        self.fields: Dict[str, Any] = {}
+        self.line_refs: Dict[str, List[int]] = {}
+    
+    def to_dict(self) -> Dict[str, Any]:
+        claim: Dict[str, Any] = {}
+        if "claimNumber" in self.fields:
+            claim["claimNumber"] = self.fields["claimNumber"]
+        claim["_line_refs"] = self.line_refs  # Internal tracking of line numbers per field
+        claim.update(self.fields)
+        return claim
+
 
 class GroupingService:
     """
@@ -72,32 +106,35 @@ class GroupingService:
             - "policy_period_summary": policy period data (for backward compatibility)
             - "_claim_warnings": internal warnings
         """
-        # Build semantic groups
-        groups: Dict[str, Dict[str, Any]] = {
-            "policy_info": {},
-            "insured_info": {},
-            "claim_header": {},
-            "claim_parties": {},
-            "dates": {},
-            "financials": {},
-            "totals": {},
-            "claim_details": {},
-        }
+        # Resolve each line's page once, then convert line numbers once per field for all later passes
+        page_by_line = self._build_page_index(standardized_metadata)
+        normalized_fields = self._annotate_fields(normalized_fields, page_by_line)
+        
+        # Build semantic groups (only groups that receive a field are created)
+        groups: Dict[str, Dict[str, Any]] = {}
         
         # Separate report-level fields from claim-level fields
         report_info: Dict[str, Any] = {}
         claim_fields: Dict[str, List[Dict[str, Any]]] = {}
         
-        # Fields that belong to report_info (appear once)
-        report_level_fields = {"insured", "runDate", "policyNumberHeader", "policyNumber"}
-        
         for canonical_key, field_list in normalized_fields.items():
-            # Get primary group for this field
-            primary_group = FIELD_GROUPS.get(canonical_key)
+            # Get primary group and report-level flag for this field in one lookup
+            routing = _FIELD_ROUTING.get(canonical_key)
+            if routing is not None:
+                primary_group, is_report_level = routing
+            else:
+                # Default to claim_details if no group specified
+                primary_group = "claim_details"
+                is_report_level = canonical_key in REPORT_LEVEL_FIELDS
+                if logger.isEnabledFor(logging.WARNING):
+                    logger.warning(
+                        "[GroupingService] No group found for field '%s', defaulting to claim_details",
+                        canonical_key,
+                    )
             
             # For report-level fields: collect unique values (don't merge all into one string)
             # For other fields: merge multiline values but keep distinct occurrences separate
-            if canonical_key in report_level_fields:
+            if is_report_level:
                 # Report-level fields: collect unique values as array with line tracking
                 unique_data = self._collect_unique_values_with_lines(field_list)
                 if unique_data:
@@ -109,45 +146,33 @@ class GroupingService:
                     else:
                         # Array of values - store both values and line refs
                         merged_value = [item["value"] for item in unique_data]
-                        # Store line refs per index for _source_refs generation
-                        report_info[f"_{canonical_key}_line_refs"] = {
-                            idx: item["lines"] for idx, item in enumerate(unique_data)
-                        }
+                        # Store line refs per index (parallel to merged_value) for _source_refs generation
+                        report_info[f"_{canonical_key}_line_refs"] = [item["lines"] for item in unique_data]
                 else:
                     merged_value = None
             else:
                 # For claim-level and other fields: merge multiline values
                 merged_value = self._merge_field_values(field_list)
             
-            if primary_group and primary_group in groups:
-                groups[primary_group][canonical_key] = merged_value
-            else:
-                # Default to claim_details if no group specified
-                logger.warning(f"[GroupingService] No group found for field '{canonical_key}', defaulting to claim_details")
-                if "claim_details" not in groups:
-                    groups["claim_details"] = {}
-                groups["claim_details"][canonical_key] = merged_value
+            groups.setdefault(primary_group, {})[canonical_key] = merged_value
             
             # Also populate backward-compatible structure
-            if canonical_key in report_level_fields:
+            if is_report_level:
                 report_info[canonical_key] = merged_value
             else:
                 # Claim-level field - keep all instances for claim assembly
                 claim_fields[canonical_key] = field_list
         
         # Detect header/footer noise (lines repeated on multiple pages)
-        ignored_lines = self._detect_noise_lines(normalized_fields, standardized_metadata)
+        ignored_lines = self._detect_noise_lines(normalized_fields, page_by_line)
         
         # Assemble claims from claim-level fields using page-aware deterministic windows
         claims, claim_warnings, assignment_traces = self._assemble_claims(
-            claim_fields, standardized_metadata, ignored_lines
+            claim_fields, page_by_line, frozenset(ignored_lines)
         )
         
-        # Remove empty groups
-        clean_groups = {k: v for k, v in groups.items() if v}
-        
         return {
-            "groups": clean_groups,
+            "groups": groups,
             "report_info": report_info,
             "claims": claims,
             "policy_period_summary": {
@@ -158,10 +183,71 @@ class GroupingService:
             "_ignored_lines": ignored_lines,  # Internal: header/footer noise lines
         }
     
+    def _build_page_index(
+        self,
+        standardized_metadata: Optional[List[Optional[StandardizedMetadata]]]
+    ) -> array:
+        """
+        Flatten standardized metadata into an int array of page numbers indexed by line number,
+        with NO_PAGE for lines without metadata. Empty if no metadata is available.
+        """
+        if not standardized_metadata:
+            return array("i")
+        return array("i", [meta.page if meta else NO_PAGE for meta in standardized_metadata])
+    
+    def _annotate_fields(
+        self,
+        normalized_fields: Dict[str, List[Dict[str, Any]]],
+        page_by_line: array
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Return a copy of normalized_fields whose field dicts are shallow copies carrying
+        precomputed line data, so claim assembly doesn't re-parse the same line numbers for
+        every claim it checks. The caller's dicts are left untouched. Added keys:
+        - "_line_ints": converted line numbers (empty if "lines" is missing or not a list)
+        - "_min_line" / "_max_line": bounds of _line_ints (None if empty)
+        - "_page_min" / "_page_max": range of pages those lines fall on (NO_PAGE without metadata)
+        """
+        num_pages = len(page_by_line)
+        annotated: Dict[str, List[Dict[str, Any]]] = {}
+        
+        for canonical_key, field_list in normalized_fields.items():
+            annotated_list = annotated[canonical_key] = []
+            for field in field_list:
+                field_lines = field.get("lines", [])
+                line_ints: List[int] = []
+                if isinstance(field_lines, list):
+                    for line_val in field_lines:
+                        converted = self._convert_line_number(line_val)
+                        if converted is not None:
+                            line_ints.append(converted)
+                
+                page_min = page_max = NO_PAGE
+                for line_num in line_ints:
+                    if line_num < num_pages:
+                        page = page_by_line[line_num]
+                        if page == NO_PAGE:
+                            continue
+                        if page_min == NO_PAGE or page < page_min:
+                            page_min = page
+                        if page_max == NO_PAGE or page > page_max:
+                            page_max = page
+                
+                annotated_list.append({
+                    **field,
+                    "_line_ints": line_ints,
+                    "_min_line": min(line_ints) if line_ints else None,
+                    "_max_line": max(line_ints) if line_ints else None,
+                    "_page_min": page_min,
+                    "_page_max": page_max,
+                })
+        
+        return annotated
+    
     def _detect_noise_lines(
         self,
         normalized_fields: Dict[str, List[Dict[str, Any]]],
-        standardized_metadata: Optional[List[Optional[StandardizedMetadata]]]
+        page_by_line: array
     ) -> List[int]:
         """
         Detect header/footer noise: lines that appear on multiple pages.
@@ -175,13 +261,15 @@ class GroupingService:
         
         Returns list of line numbers to ignore.
         """
-        if not standardized_metadata:
+        if not page_by_line:
             return []
         
-        ignored_lines: List[int] = []
+        num_pages = len(page_by_line)
+        ignored_lines = set()
         
-        # Track value -> list of (line_num, page) pairs
-        value_to_locations: Dict[str, List[Tuple[int, int]]] = {}
+        # Track value -> line numbers and value -> distinct pages
+        value_to_lines: Dict[str, List[int]] = defaultdict(list)
+        value_to_pages: Dict[str, set] = defaultdict(set)
         
         for canonical_key, field_list in normalized_fields.items():
             for field in field_list:
@@ -189,50 +277,37 @@ class GroupingService:
                 if not value or len(value) < 3:  # Skip very short values
                     continue
                 
-                field_lines = field.get("lines", [])
-                if not isinstance(field_lines, list):
-                    continue
-                
-                for line_val in field_lines:
-                    line_num = self._convert_line_number(line_val)
-                    if line_num is None:
-                        continue
-                    if line_num >= len(standardized_metadata):
+                for line_num in field["_line_ints"]:
+                    if line_num >= num_pages:
                         continue
                     
-                    std_meta = standardized_metadata[line_num]
-                    if std_meta is None:
+                    page = page_by_line[line_num]
+                    if page == NO_PAGE:
                         continue
                     
-                    page = std_meta.page
-                    
-                    if value not in value_to_locations:
-                        value_to_locations[value] = []
-                    value_to_locations[value].append((line_num, page))
+                    value_to_lines[value].append(line_num)
+                    value_to_pages[value].add(page)
         
         # Find values that appear on 3+ different pages (likely header/footer)
-        for value, locations in value_to_locations.items():
-            if len(locations) < 3:  # Need at least 3 occurrences
+        for value, pages in value_to_pages.items():
+            if len(pages) < 3:  # Most values occur on one page; skip them without further work
                 continue
             
-            pages = set(page for _, page in locations)
-            if len(pages) >= 3:  # Appears on 3+ different pages
-                # This is likely noise - mark all lines as ignored
-                for line_num, _ in locations:
-                    if line_num not in ignored_lines:
-                        ignored_lines.append(line_num)
-                logger.info(
-                    f"[GroupingService] Detected noise: value '{value[:50]}...' appears on {len(pages)} pages, "
-                    f"marking {len(locations)} lines as ignored"
-                )
+            # This is likely noise - mark all lines as ignored
+            lines = value_to_lines[value]
+            ignored_lines.update(lines)
+            logger.info(
+                "[GroupingService] Detected noise: value '%s...' appears on %d pages, marking %d lines as ignored",
+                value[:50], len(pages), len(lines),
+            )
         
         return sorted(ignored_lines)
     
     def _assemble_claims(
         self, 
         claim_fields: Dict[str, List[Dict[str, Any]]],
-        standardized_metadata: Optional[List[Optional[StandardizedMetadata]]] = None,
-        ignored_lines: Optional[List[int]] = None
+        page_by_line: Optional[array] = None,
+        ignored_lines: Optional[FrozenSet[int]] = None
     ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]], List[Dict[str, Any]]]:
         """
         Assemble claim objects from claim-level fields using page-aware deterministic claim windows.
@@ -259,31 +334,22 @@ class GroupingService:
         assignment_traces: List[Dict[str, Any]] = []
         
         if ignored_lines is None:
-            ignored_lines = []
+            ignored_lines = frozenset()
         
         # Get all claim numbers and their line numbers
         claim_numbers = claim_fields.get("claimNumber", [])
         if not claim_numbers:
             # No claim numbers - create a single claim with all fields
-            claim: Dict[str, Any] = {
-                "_line_refs": {}  # Internal tracking of line numbers per field
-            }
+            claim = ClaimRecord()
             for key, field_list in claim_fields.items():
                 merged = self._merge_field_values(field_list)
                 if merged:
-                    claim[key] = merged
+                    claim.fields[key] = merged
                     # Collect all line numbers for this field
-                    all_lines = []
-                    for field in field_list:
-                        lines = field.get("lines", [])
-                        if isinstance(lines, list):
-                            for line_val in lines:
-                                converted = self._convert_line_number(line_val)
-                                if converted is not None:
-                                    all_lines.append(converted)
+                    all_lines = self._unique_sorted_line_ints(*field_list)
                     if all_lines:
-                        claim["_line_refs"][key] = sorted(list(set(all_lines)))
-            return [claim] if len(claim) > 1 else [], warnings, []
+                        claim.line_refs[key] = all_lines
+            return [claim.to_dict()] if claim.fields else [], warnings, []
         
         # Sort claim numbers by their first line number to establish order
         def get_first_line(field: Dict[str, Any]) -> int:
@@ -296,6 +362,21 @@ class GroupingService:
         
         sorted_claim_numbers = sorted(claim_numbers, key=get_first_line)
         
+        # Index each key's candidate fields by first line so a claim window maps to a bisect slice
+        # (ignored header/footer noise and fields without valid lines are never candidates)
+        candidates_by_key: Dict[str, Tuple[List[Dict[str, Any]], List[int]]] = {}
+        for key, field_list in claim_fields.items():
+            if key == "claimNumber":
+                continue
+            candidates = sorted(
+                (
+                    field for field in field_list
+                    if field["_line_ints"] and ignored_lines.isdisjoint(field["_line_ints"])
+                ),
+                key=lambda field: field["_min_line"],
+            )
+            candidates_by_key[key] = (candidates, [field["_min_line"] for field in candidates])
+        
         # Build claim windows: each claim spans from its claimNumber to the next claimNumber
         claims: List[Dict[str, Any]] = []
         
@@ -307,7 +388,7 @@ class GroupingService:
             # Get the first line number of this claim (the anchor)
             valid_claim_lines = [l for l in claim_num_lines if isinstance(l, int) and l >= 0]
             if not valid_claim_lines:
-                logger.warning(f"[GroupingService] Claim number field has no valid line numbers, skipping")
+                logger.warning("[GroupingService] Claim number field has no valid line numbers, skipping")
                 continue
             first_claim_line = min(valid_claim_lines)
             if first_claim_line == 999999:
@@ -316,10 +397,10 @@ class GroupingService:
             # PAGE-AWARE LOGIC: Get page number of claim anchor
             # This is critical for multi-page claim tables where headers repeat
             claim_anchor_page = None
-            if standardized_metadata and first_claim_line < len(standardized_metadata):
-                claim_meta = standardized_metadata[first_claim_line]
-                if claim_meta:
-                    claim_anchor_page = claim_meta.page
+            if page_by_line and first_claim_line < len(page_by_line):
+                page = page_by_line[first_claim_line]
+                if page != NO_PAGE:
+                    claim_anchor_page = page
             
             # CLAIM WINDOW LOGIC:
             # Define a strict claim window: from this claimNumber line until the next claimNumber line.
@@ -331,50 +412,29 @@ class GroupingService:
             # - End: first line number of next claim's claimNumber (or end of document if last claim)
             if idx + 1 < len(sorted_claim_numbers):
                 next_claim_num_field = sorted_claim_numbers[idx + 1]
-                next_claim_lines = next_claim_num_field.get("lines", [])
-                if next_claim_lines and isinstance(next_claim_lines, list):
-                    # Convert line numbers for next claim
-                    valid_next_lines = []
-                    for line_val in next_claim_lines:
-                        converted = self._convert_line_number(line_val)
-                        if converted is not None:
-                            valid_next_lines.append(converted)
-                    if valid_next_lines:
-                        next_claim_first_line = min(valid_next_lines)
-                        window_end = next_claim_first_line  # EXCLUSIVE boundary
-                    else:
-                        window_end = 999999  # No valid lines, window extends to end
+                next_claim_first_line = next_claim_num_field["_min_line"]
+                if next_claim_first_line is not None:
+                    window_end = next_claim_first_line  # EXCLUSIVE boundary
                 else:
-                    window_end = 999999  # No next claim, window extends to end
+                    window_end = 999999  # No valid lines, window extends to end
             else:
                 window_end = 999999  # Last claim, window extends to end
             
             # Create claim object with internal line refs tracking
-            claim: Dict[str, Any] = {
-                "claimNumber": claim_num_field.get("value"),
-                "_line_refs": {
-                    "claimNumber": sorted(list(set([
-                        self._convert_line_number(l) 
-                        for l in claim_num_lines 
-                        if self._convert_line_number(l) is not None
-                    ])))
-                }
-            }
+            claim = ClaimRecord()
+            claim.fields["claimNumber"] = claim_num_field.get("value")
+            claim.line_refs["claimNumber"] = self._unique_sorted_line_ints(claim_num_field)
             
             # Find fields that fall within this claim's window
-            for key, field_list in claim_fields.items():
-                if key == "claimNumber":
-                    continue
-                
+            for key, (candidates, candidate_min_lines) in candidates_by_key.items():
                 # Collect fields that fall within the claim window
                 matching_fields = []
-                field_lines_for_claim = []
                 
-                for field in field_list:
-                    field_lines = field.get("lines", [])
-                    if not isinstance(field_lines, list):
-                        continue
-                    
+                # Only fields whose first line is inside [first_claim_line, window_end) can belong here
+                lo = bisect_left(candidate_min_lines, first_claim_line)
+                hi = bisect_left(candidate_min_lines, window_end, lo)
+                
+                for field in candidates[lo:hi]:
                     # CLAIM WINDOW ASSIGNMENT (PAGE-AWARE):
                     # A field belongs to this claim if ANY of its line numbers fall within the claim window.
                     # This handles multiline fields that may span across the window boundary.
@@ -386,30 +446,13 @@ class GroupingService:
                     # This ensures fields that overlap the window are included, while fields
                     # completely outside the window are excluded. Page awareness prevents
                     # fields from distant pages (e.g., page 1 vs page 5) from being incorrectly assigned.
-                    # Convert line numbers (handles hex strings, floats, etc.)
-                    field_line_nums = []
-                    for line_val in field_lines:
-                        converted = self._convert_line_number(line_val)
-                        if converted is not None:
-                            field_line_nums.append(converted)
-                    if not field_line_nums:
-                        continue
-                    
-                    # Skip fields on ignored lines (header/footer noise)
-                    if any(line in ignored_lines for line in field_line_nums):
-                        continue
+                    # Line numbers were converted once in _annotate_fields (handles hex strings, floats, etc.)
+                    min_field_line = field["_min_line"]
+                    max_field_line = field["_max_line"]
                     
-                    min_field_line = min(field_line_nums)
-                    max_field_line = max(field_line_nums)
-                    
-                    # Check page constraints if metadata available
-                    field_pages = set()
-                    if standardized_metadata:
-                        for line_num in field_line_nums:
-                            if line_num < len(standardized_metadata):
-                                field_meta = standardized_metadata[line_num]
-                                if field_meta:
-                                    field_pages.add(field_meta.page)
+                    # Page range covered by the field (NO_PAGE if metadata unavailable)
+                    field_min_page = field["_page_min"]
+                    field_max_page = field["_page_max"]
                     
                     # PAGE-AWARE CHECK:
                     # If claim anchor has a page and field has pages, check page difference
@@ -418,10 +461,7 @@ class GroupingService:
                     rule_used = "window"
                     page_diff = 0  # Default value
                     
-                    if claim_anchor_page is not None and field_pages and len(field_pages) > 0:
-                        # Safe min/max - field_pages is a set, and we've verified it's not empty
-                        field_min_page = min(field_pages)
-                        field_max_page = max(field_pages)
+                    if claim_anchor_page is not None and field_min_page != NO_PAGE:
                         page_diff = min(
                             abs(field_min_page - claim_anchor_page),
                             abs(field_max_page - claim_anchor_page)
@@ -437,10 +477,11 @@ class GroupingService:
                                 "reason": f"page difference too large (claim page {claim_anchor_page}, field page {field_min_page}, diff {page_diff})",
                                 "field_value": field.get("value"),
                             })
-                            logger.warning(
-                                f"[GroupingService] Field '{key}' on page {field_min_page} too far from claim "
-                                f"{claim_num_field.get('value')} on page {claim_anchor_page}"
-                            )
+                            if logger.isEnabledFor(logging.WARNING):
+                                logger.warning(
+                                    "[GroupingService] Field '%s' on page %s too far from claim %s on page %s",
+                                    key, field_min_page, claim_num_field.get("value"), claim_anchor_page,
+                                )
                     
                     # STRICT LINE-BASED WINDOW CHECK:
                     # A field belongs to this claim ONLY if ALL its line numbers are within the window.
@@ -451,15 +492,12 @@ class GroupingService:
                     # 2. ALL field lines must be < window_end (field ends before next claim starts)
                     # 
                     # This ensures that if a field has ANY line at or after window_end, it belongs to the next claim.
-                    all_lines_in_window = (
-                        min_field_line >= first_claim_line and 
-                        max_field_line < window_end
-                    )
+                    # Rule 1 and the start of rule 2 already hold for every field in the bisect slice.
+                    all_lines_in_window = max_field_line < window_end
                     
                     # Field is assigned if both line and page constraints are satisfied
                     if all_lines_in_window and page_ok:
                         matching_fields.append(field)
-                        field_lines_for_claim.extend(field_line_nums)
                         
                         # Track assignment reason for diagnostics
                         assignment_traces.append({
@@ -469,18 +507,6 @@ class GroupingService:
                             "distance": distance,
                             "page_diff": page_diff,  # Use the already-calculated value
                         })
-                    elif not all_lines_in_window and min_field_line >= window_end:
-                        # Field is outside window (after this claim) - log warning for diagnostics
-                        warnings.append({
-                            "claimNumber": claim_num_field.get("value"),
-                            "field": key,
-                            "reason": f"outside claim window (field line {min_field_line} >= window end {window_end})",
-                            "field_value": field.get("value"),
-                        })
-                        logger.warning(
-                            f"[GroupingService] Field '{key}' (line {min_field_line}) outside claim window "
-                            f"for claim {claim_num_field.get('value')} (window: {first_claim_line}-{window_end})"
-                        )
                 
                 if matching_fields:
                     # IMPORTANT: For claim-level fields, we should NOT merge multiple distinct values.
@@ -491,88 +517,40 @@ class GroupingService:
                     # This handles cases where the same field label appears multiple times in the document.
                     if len(matching_fields) == 1:
                         # Single field - use it directly
-                        claim[key] = matching_fields[0].get("value")
-                        claim["_line_refs"][key] = sorted(list(set(field_lines_for_claim)))
+                        claim.fields[key] = matching_fields[0].get("value")
+                        claim.line_refs[key] = self._unique_sorted_line_ints(matching_fields[0])
                     else:
                         # Multiple fields match - choose the one closest to claim anchor
-                        # Sort by distance from claim anchor (first line of field vs first line of claim)
-                        def get_distance_to_claim(field: Dict[str, Any]) -> int:
-                            field_lines = field.get("lines", [])
-                            if not field_lines:
-                                return 999999
-                            converted_lines = []
-                            for line_val in field_lines:
-                                converted = self._convert_line_number(line_val)
-                                if converted is not None:
-                                    converted_lines.append(converted)
-                            if not converted_lines:
-                                return 999999
-                            min_field_line = min(converted_lines)
-                            return abs(min_field_line - first_claim_line)
-                        
-                        # Sort by distance and take the closest one
-                        sorted_by_distance = sorted(matching_fields, key=get_distance_to_claim)
-                        closest_field = sorted_by_distance[0]
-                        claim[key] = closest_field.get("value")
+                        # (first line of field vs first line of claim; ties keep the earliest match)
+                        closest_field = min(
+                            matching_fields, key=lambda field: abs(field["_min_line"] - first_claim_line)
+                        )
+                        claim.fields[key] = closest_field.get("value")
                         
                         # Store line numbers for the closest field only
-                        closest_field_lines = closest_field.get("lines", [])
-                        closest_converted = []
-                        for line_val in closest_field_lines:
-                            converted = self._convert_line_number(line_val)
-                            if converted is not None:
-                                closest_converted.append(converted)
-                        claim["_line_refs"][key] = sorted(list(set(closest_converted)))
+                        claim.line_refs[key] = self._unique_sorted_line_ints(closest_field)
             
-            if len(claim) > 2:  # More than just claimNumber and _line_refs
-                claims.append(claim)
+            if len(claim.fields) > 1:  # More than just claimNumber
+                claims.append(claim.to_dict())
         
         return claims, warnings, assignment_traces
     
     def _convert_line_number(self, line_val: Any) -> Optional[int]:
-        """
-        Convert a line number to an integer, handling hex strings and other formats.
-        
-        Handles:
-        - Integers: returns as-is
-        - Hex strings: "2A" -> 42, "0x2A" -> 42
-        - Float integers: 2.0 -> 2
-        - String integers: "42" -> 42
-        
-        Returns None if conversion fails.
-        """
-        if isinstance(line_val, int):
+        """Convert a line number to an integer (see line_numbers.convert_line_number)."""
+        # Fast paths: plain ints are by far the most common input, strings hit the shared memoized parser
+        value_type = type(line_val)
+        if value_type is int:
             return line_val if line_val >= 0 else None
-        
-        if isinstance(line_val, float):
-            # Check if it's effectively an integer
-            if line_val.is_integer() and line_val >= 0:
-                return int(line_val)
-            return None
-        
-        if isinstance(line_val, str):
-            line_str = line_val.strip()
-            # Try hex format (with or without 0x prefix)
-            if line_str.startswith("0x") or line_str.startswith("0X"):
-                try:
-                    return int(line_str, 16)
-                except ValueError:
-                    pass
-            # Try hex without prefix (e.g., "2A", "2C")
-            try:
-                # Check if it looks like hex (contains A-F)
-                if any(c in line_str.upper() for c in "ABCDEF"):
-                    return int(line_str, 16)
-            except ValueError:
-                pass
-            # Try regular integer
-            try:
-                val = int(line_str)
-                return val if val >= 0 else None
-            except ValueError:
-                pass
-        
-        return None
+        if value_type is str:
+            return parse_line_string(line_val)
+        return convert_line_number(line_val)
+    
+    def _unique_sorted_line_ints(self, *fields: Dict[str, Any]) -> List[int]:
+        """Sorted, de-duplicated union of the annotated line numbers of the given fields."""
+        line_ints = set()
+        for field in fields:
+            line_ints.update(field["_line_ints"])
+        return sorted(line_ints)
     
     def _collect_unique_values_with_lines(self, field_list: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """
@@ -593,17 +571,10 @@ class GroupingService:
                 value_str = str(value).strip()
                 if value_str and value_str not in seen:
                     seen.add(value_str)
-                    # Collect all line numbers for this value, converting hex strings
-                    field_lines = field.get("lines", [])
-                    valid_lines = []
-                    for line_val in field_lines:
-                        converted = self._convert_line_number(line_val)
-                        if converted is not None:
-                            valid_lines.append(converted)
-                    
+                    # All line numbers for this value (already converted in _annotate_fields)
                     unique_data.append({
                         "value": value_str,
-                        "lines": sorted(list(set(valid_lines))) if valid_lines else []
+                        "lines": self._unique_sorted_line_ints(field)
                     })
         
         return unique_data
@@ -634,13 +605,21 @@ class GroupingService:
                     return first_line
             return 999999  # Put fields without lines at the end
         
-        sorted_fields = sorted(field_list, key=get_first_line)
+        first_lines = [get_first_line(field) for field in field_list]
+        if all(a <= b for a, b in zip(first_lines, first_lines[1:])):
+            # Fragments usually arrive in reading order already
+            sorted_fields = field_list
+        else:
+            # (line, index) keys sort without comparing the field dicts and keep ties stable
+            keyed = [(line, idx, field) for idx, (line, field) in enumerate(zip(first_lines, field_list))]
+            keyed.sort()
+            sorted_fields = [field for _, _, field in keyed]
         
         # Merge values in line order with space
-        values = [f.get("value", "") for f in sorted_fields if f.get("value")]
-        merged_value = " ".join(str(v) for v in values if v)
+        parts = [str(v) for v in (f.get("value") for f in sorted_fields) if v]
+        merged_value = " ".join(parts)
         
-        return merged_value if merged_value else None
+        return merged_value or None
 
 
 grouping_service = GroupingService()
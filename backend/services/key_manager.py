@@ -1,8 +1,10 @@
 import os
-import json
 import logging
+import threading
 from typing import Dict, Optional
 
+import orjson
+
 logger = logging.getLogger(__name__)
 
 # Resolve path relative to this file (backend/services/key_manager.py) -> backend/Api_keys
@@ -12,43 +14,89 @@ KEY_FILE = os.path.join(BASE_DIR, "Api_keys")
 class KeyManager:
     def __init__(self):
         self.key_file = KEY_FILE
+        # Parsed key file, reused until the file's mtime changes
+        self._lock = threading.Lock()
+        self._cached_keys: Optional[Dict[str, str]] = None
+        self._cached_mtime_ns: Optional[int] = None
         self._ensure_key_file()
 
     def _ensure_key_file(self):
         if not os.path.exists(self.key_file):
-            with open(self.key_file, "w") as f:
-                json.dump({}, f)
+            with open(self.key_file, "wb") as f:
+                f.write(orjson.dumps({}))
 
     def get_all_keys(self) -> Dict[str, str]:
+        """
+        Returns all stored keys. The parsed file is cached in memory and only re-read when
+        its mtime changes, so the returned dict is shared and must not be mutated.
+        """
         try:
-            with open(self.key_file, "r") as f:
-                return json.load(f)
-        except json.JSONDecodeError:
-            return {}
+            mtime_ns = os.stat(self.key_file).st_mtime_ns
         except Exception as e:
             logger.error(f"Error reading key file: {e}")
             return {}
 
+        with self._lock:
+            if self._cached_keys is not None and self._cached_mtime_ns == mtime_ns:
+                return self._cached_keys
+
+            try:
+                with open(self.key_file, "rb") as f:
+                    keys = orjson.loads(f.read())
+            except orjson.JSONDecodeError:
+                keys = {}
+            except Exception as e:
+                logger.error(f"Error reading key file: {e}")
+                return {}
+
+            self._cached_keys = keys
+            self._cached_mtime_ns = mtime_ns
+            return keys
+
     def get_key(self, provider: str) -> Optional[str]:
         keys = self.get_all_keys()
         return keys.get(provider)
 
+    def _write_keys(self, keys: Dict[str, str]):
+        """
+        Write to a temp file and swap it in with os.replace, so a crash mid-write can't
+        truncate the key file and readers always see either the old or the new contents.
+        The temp file is owner-only (0600), since os.replace gives the key file its mode.
+        """
+        tmp_path = f"{self.key_file}.tmp"
+        with self._lock:
+            try:
+                # The opener creates the file 0600; open() closes its descriptor if anything fails
+                with open(tmp_path, "wb", opener=lambda path, flags: os.open(path, flags, 0o600)) as f:
+                    # The create mode only applies to new files; also tighten a leftover temp file.
+                    # os.chmod rather than os.fchmod, which Windows lacks before Python 3.13
+                    os.chmod(tmp_path, 0o600)
+                    f.write(orjson.dumps(keys, option=orjson.OPT_INDENT_2))
+                os.replace(tmp_path, self.key_file)
+            except BaseException:
+                try:
+                    os.unlink(tmp_path)
+                except OSError:
+                    pass
+                raise
+            # Refresh the cache from what we just wrote instead of re-reading the file
+            self._cached_keys = keys
+            self._cached_mtime_ns = os.stat(self.key_file).st_mtime_ns
+
     def set_key(self, provider: str, key: str):
-        keys = self.get_all_keys()
+        keys = dict(self.get_all_keys())
         keys[provider] = key
         try:
-            with open(self.key_file, "w") as f:
-                json.dump(keys, f, indent=2)
+            self._write_keys(keys)
         except Exception as e:
             logger.error(f"Error writing key file: {e}")
 
     def delete_key(self, provider: str):
-        keys = self.get_all_keys()
+        keys = dict(self.get_all_keys())
         if provider in keys:
             del keys[provider]
             try:
-                with open(self.key_file, "w") as f:
-                    json.dump(keys, f, indent=2)
+                self._write_keys(keys)
             except Exception as e:
                 logger.error(f"Error writing key file: {e}")
 
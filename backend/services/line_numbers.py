@@ -0,0 +1,79 @@
+"""
+Line number parsing shared by the LLM and grouping services.
+
+The model emits line markers as ints, floats or strings (decimal or hex, with or
+without a 0x prefix); both services normalize them through convert_line_number.
+"""
+
+import functools
+import re
+from typing import Any, Optional
+
+# A string line number containing any of these is parsed as hex
+_HEX_LETTERS = frozenset("ABCDEFabcdef")
+
+# Plain hex line number, optionally 0x-prefixed (pure decimal strings are handled before this)
+_HEX_RE = re.compile(r"(?:0[xX])?[0-9A-Fa-f]+")
+
+
+@functools.lru_cache(maxsize=8192)
+def parse_line_string(line_val: str) -> Optional[int]:
+    """
+    String branch of convert_line_number. The model repeats the same markers
+    ("12", "0x1A") across items and documents, so parsed results are memoized.
+    """
+    line_str = line_val.strip()
+    # Fast paths for the two shapes the model actually emits, without raising ValueError
+    if line_str.isascii() and line_str.isdigit():
+        return int(line_str)
+    if _HEX_RE.fullmatch(line_str):
+        return int(line_str, 16)
+    # Anything else (signs, underscores, junk) keeps the original try-each-format fallback
+    # Try hex format (with or without 0x prefix)
+    if line_str.startswith("0x") or line_str.startswith("0X"):
+        try:
+            return int(line_str, 16)
+        except ValueError:
+            pass
+    # Try hex without prefix (e.g., "2A", "2C")
+    try:
+        # Check if it looks like hex (contains A-F)
+        if not _HEX_LETTERS.isdisjoint(line_str):
+            return int(line_str, 16)
+    except ValueError:
+        pass
+    # Try regular integer
+    try:
+        val = int(line_str)
+        return val if val >= 0 else None
+    except ValueError:
+        pass
+    return None
+
+
+def convert_line_number(line_val: Any) -> Optional[int]:
+    """
+    Convert a line number to an integer, handling hex strings and other formats.
+
+    Handles:
+    - Integers: returns as-is
+    - Hex strings: "2A" -> 42, "0x2A" -> 42
+    - Float integers: 2.0 -> 2
+    - String integers: "42" -> 42
+
+    Returns None if conversion fails. Strings go through the memoized parse_line_string;
+    ints and floats are not cached, since an lru_cache would treat 1, 1.0 and True as one key.
+    """
+    if isinstance(line_val, int):
+        return line_val if line_val >= 0 else None
+
+    if isinstance(line_val, float):
+        # Check if it's effectively an integer
+        if line_val.is_integer() and line_val >= 0:
+            return int(line_val)
+        return None
+
+    if isinstance(line_val, str):
+        return parse_line_string(line_val)
+
+    return None
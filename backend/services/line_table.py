@@ -0,0 +1,179 @@
+"""
+Compact line-metadata lookup table for highlight requests.
+
+Stores LLMWhisperer line_metadata as a (num_lines, 4) NumPy array
+[page, base_y, height, page_height] next to the JSON outputs, so the highlight
+endpoint can memory-map it and index a single line without parsing the full
+extraction JSON.
+"""
+
+import os
+import logging
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from backend.config import config
+
+logger = logging.getLogger(__name__)
+
+LINE_TABLE_SUFFIX = "_lines"
+
+# Rows whose source entry is not a [page, base_y, height, page_height] list get this page value
+INVALID_ROW_PAGE = -1
+
+# Memory-mapped tables keyed by path -> (mtime_ns, array), least recently used first
+_TABLE_CACHE_MAX_ENTRIES = 64
+_table_cache: "OrderedDict[str, Tuple[int, Any]]" = OrderedDict()
+
+# Per-page sorted arrays of valid line indices keyed by path -> (mtime_ns, {page: indices})
+_VALID_INDEX_CACHE_MAX_ENTRIES = 64
+_valid_index_cache: "OrderedDict[str, Tuple[int, Dict[int, Any]]]" = OrderedDict()
+
+
+def _table_path(whisper_hash: str) -> str:
+    safe_hash = whisper_hash.replace("|", "_")
+    return os.path.join(config.OUTPUT_DIR, f"{safe_hash}{LINE_TABLE_SUFFIX}.npy")
+
+
+def clear_line_table_cache():
+    """Drop every cached table and page index (e.g. after the output directory is reset)."""
+    _table_cache.clear()
+    _valid_index_cache.clear()
+
+
+def build_line_table(line_metadata: List[Any]):
+    """
+    Convert raw line_metadata into a float64 array of shape (num_lines, 4).
+    float64 keeps fractional coordinates exact, so highlight math matches the JSON path.
+    Malformed entries are kept (to preserve line indices) with page = INVALID_ROW_PAGE.
+    """
+    table = np.zeros((len(line_metadata), 4), dtype=np.float64)
+    for idx, raw in enumerate(line_metadata):
+        if not raw or not isinstance(raw, list) or len(raw) < 4:
+            table[idx, 0] = INVALID_ROW_PAGE
+            continue
+        try:
+            table[idx] = raw[:4]
+        except (TypeError, ValueError):
+            table[idx] = (INVALID_ROW_PAGE, 0, 0, 0)
+    return table
+
+
+def save_line_table(whisper_hash: str, line_metadata: Optional[List[Any]]) -> Optional[str]:
+    """
+    Persist the lookup table for a hash. No-op when NumPy is unavailable or metadata is not a list.
+
+    The table is written to a temp file and swapped in with os.replace: other requests may be
+    memory-mapping the current file, and truncating it under a live mapping crashes the process.
+    """
+    if np is None or not isinstance(line_metadata, list):
+        return None
+
+    path = _table_path(whisper_hash)
+    os.makedirs(config.OUTPUT_DIR, exist_ok=True)
+    table = build_line_table(line_metadata)
+    tmp_path = os.path.join(config.OUTPUT_DIR, f".{os.path.basename(path)}.{uuid.uuid4().hex}.tmp")
+    try:
+        # Saving through a file object keeps np.save from appending ".npy" to the temp name
+        with open(tmp_path, "wb") as f:
+            np.save(f, table)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+    _table_cache.pop(path, None)
+    return path
+
+
+def load_line_table(whisper_hash: str):
+    """
+    Return the memory-mapped lookup table for a hash, or None if it hasn't been written
+    (callers fall back to the JSON extraction in that case).
+    """
+    if np is None:
+        return None
+
+    path = _table_path(whisper_hash)
+    try:
+        mtime_ns = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        _table_cache.pop(path, None)
+        return None
+
+    cached = _table_cache.get(path)
+    if cached is not None and cached[0] == mtime_ns:
+        _table_cache.move_to_end(path)
+        return cached[1]
+
+    try:
+        table = np.load(path, mmap_mode="r")
+    except (OSError, ValueError, EOFError) as e:
+        logger.warning(f"[LineTable] Failed to load {path}: {e}")
+        return None
+
+    _table_cache[path] = (mtime_ns, table)
+    _table_cache.move_to_end(path)
+    if len(_table_cache) > _TABLE_CACHE_MAX_ENTRIES:
+        _table_cache.popitem(last=False)
+    return table
+
+
+def _valid_lines_by_page(whisper_hash: str, table) -> Dict[int, Any]:
+    """Sorted indices of lines with positive height/page_height, grouped by page (cached per table)."""
+    path = _table_path(whisper_hash)
+    mtime_ns = _table_cache.get(path, (None,))[0]
+    cached = _valid_index_cache.get(path)
+    if cached is not None and cached[0] == mtime_ns:
+        _valid_index_cache.move_to_end(path)
+        return cached[1]
+
+    pages = table[:, 0]
+    valid = (pages != INVALID_ROW_PAGE) & (table[:, 2] > 0) & (table[:, 3] > 0)
+    valid_pages = pages[valid]
+    valid_indices = np.flatnonzero(valid)
+    by_page = {int(page): valid_indices[valid_pages == page] for page in np.unique(valid_pages)}
+
+    _valid_index_cache[path] = (mtime_ns, by_page)
+    if len(_valid_index_cache) > _VALID_INDEX_CACHE_MAX_ENTRIES:
+        _valid_index_cache.popitem(last=False)
+    return by_page
+
+
+def nearest_valid_line(whisper_hash: str, table, page: int, line: int) -> Optional[int]:
+    """
+    Index of the closest line on the same page with valid dimensions, or None.
+    Ties prefer the earlier line, matching the previous-then-next neighbor check.
+    """
+    candidates = _valid_lines_by_page(whisper_hash, table).get(page)
+    if candidates is None or len(candidates) == 0:
+        return None
+
+    pos = int(np.searchsorted(candidates, line))
+    best = None
+    if pos > 0:
+        best = int(candidates[pos - 1])
+    if pos < len(candidates):
+        after = int(candidates[pos])
+        if best is None or after - line < line - best:
+            best = after
+    return best
+
+
+def row_to_raw(row) -> Optional[List[Any]]:
+    """
+    Convert a table row back to the [page, base_y, height, page_height] list format.
+    Returns None for rows that came from malformed metadata entries.
+    """
+    page, base_y, height, page_height = row.tolist()
+    if page == INVALID_ROW_PAGE:
+        return None
+    return [int(page), base_y, height, page_height]
@@ -1,13 +1,17 @@
-import json
+import asyncio
+import hashlib
 import logging
 import os
+import time
 from typing import Any, Dict, List, Optional, Union
 
 import litellm
+import orjson
 
 from backend.config import config
 from backend.services.semantic_tagger import semantic_tagger
 from backend.services.key_manager import key_manager
+from backend.services.line_numbers import convert_line_number
 
 
 logger = logging.getLogger(__name__)
@@ -253,6 +257,109 @@ def find_canonical_name(source_key: str) -> Optional[str]:
     return None
 
 
+def _build_system_prompt() -> str:
+    """
+    Build system prompt that instructs LLM to extract a flat array of items with line numbers.
+    No normalization, grouping, structure inference, or coordinate math - just raw extraction.
+    """
+    # Build mapping synonyms section for the prompt
+    mapping_lines = [
+        "**Field Mapping Synonyms (for reference):**\n\n",
+        "The following mappings help identify canonical field names. Use the exact source key as it appears in the document.\n\n",
+    ]
+    for canonical_name, synonyms in CANONICAL_MAPPINGS.items():
+        line = f"- `{canonical_name}`: {', '.join(synonyms[:5])}"  # Show first 5 synonyms
+        if len(synonyms) > 5:
+            line += f", ... (and {len(synonyms) - 5} more)"
+        mapping_lines.append(line + "\n")
+    mapping_lines.append("\n")
+    mapping_section = "".join(mapping_lines)
+    
+    return (
+        "You are an expert insurance document extraction AI. Your goal is to extract **ALL** visible data from the Loss Run Report.\n\n"
+        "**CRITICAL: Your role is ONLY to extract raw fields exactly as seen in the document.**\n\n"
+        "**STRICT RULES - YOU MUST FOLLOW THESE:**\n\n"
+        "1. Extract EVERY visible field/value from the document\n"
+        "2. Do NOT normalize keys (use exact labels as they appear)\n"
+        "3. Do NOT group claims or create nested structure\n"
+        "4. Do NOT invent structure or infer relationships\n"
+        "5. Do NOT skip columns or summarize data\n"
+        "6. Do NOT infer missing values\n"
+        "7. Do NOT guess line numbers - if unclear, skip the item\n\n"
+        + mapping_section +
+        "**Line Number References:**\n\n"
+        "- The raw text contains line numbers in square brackets (e.g., [15], [0x11])\n"
+        "- For each field, list ALL line numbers where that field's value appears\n"
+        "- Line numbers must match the [NN] markers in the text EXACTLY\n"
+        "- Multi-line values → include all line numbers (e.g., [15, 16, 17])\n"
+        "- If line numbers are unclear or missing → skip the item (do NOT guess)\n\n"
+        "**Output JSON Structure (MANDATORY):**\n\n"
+        "Return valid JSON with this EXACT structure:\n"
+        "{\n"
+        '  "items": [\n'
+        "    {\n"
+        '      "source_key": "Claimant Name",\n'
+        '      "value": "SYDIA",\n'
+        '      "line_numbers": [15, 16, 17]\n'
+        "    },\n"
+        "    {\n"
+        '      "source_key": "Claim Number",\n'
+        '      "value": "12345",\n'
+        '      "line_numbers": [12]\n'
+        "    }\n"
+        "  ]\n"
+        "}\n\n"
+        "**Requirements:**\n\n"
+        "- `items` is an array\n"
+        "- One object per extracted value\n"
+        "- `source_key` = exact label as it appears in document (use the original field name as seen)\n"
+        "- `value` = exact value as it appears (no transformation)\n"
+        "- `line_numbers` = array of integers matching [NN] markers exactly\n"
+        "- If a value exists, it MUST have line_numbers\n"
+        "- If line_numbers are unclear → skip the item (do NOT guess)\n"
+        "- Keep strictly to JSON. Do not add comments or extra keys.\n"
+        "- If a field is not present, omit it (do not include null values)."
+    )
+
+
+# Depends only on CANONICAL_MAPPINGS, so it is built once at import and shared by every LLMService
+_SYSTEM_PROMPT = _build_system_prompt()
+
+# Short fingerprint of the prompt, used as its version in cache keys (changes whenever the prompt does)
+_SYSTEM_PROMPT_HASH = hashlib.blake2b(_SYSTEM_PROMPT.encode("utf-8"), digest_size=8).hexdigest()
+
+
+class _AsyncTokenBucket:
+    """
+    Token bucket refilled continuously at rate_per_min, holding at most one minute's worth.
+    acquire() waits until enough budget is available, so bursts are spread out client-side
+    instead of being rejected upstream with 429s. A non-positive rate disables the limiter.
+    """
+
+    def __init__(self, rate_per_min: int) -> None:
+        self.rate_per_sec = rate_per_min / 60.0
+        self.capacity = float(rate_per_min)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, amount: float = 1.0) -> None:
+        if self.rate_per_sec <= 0:
+            return
+        # A single request larger than the bucket waits for a full bucket rather than forever
+        amount = min(amount, self.capacity)
+        # Waiters queue on the lock, so budget is handed out in arrival order
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate_per_sec)
+                self.updated = now
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                await asyncio.sleep((amount - self.tokens) / self.rate_per_sec)
+
+
 class LLMService:
     """
     Handles LLM-powered extraction of raw fields from documents.
@@ -264,7 +371,11 @@ class LLMService:
     def __init__(self) -> None:
         # Default model
         self.default_model = "groq/llama-3.3-70b-versatile"
-        self.system_prompt = self._build_system_prompt()
+        self.system_prompt = _SYSTEM_PROMPT
+        self.system_prompt_hash = _SYSTEM_PROMPT_HASH
+        # Client-side Groq limits (see config.GROQ_RPM / GROQ_TPM)
+        self._groq_requests = _AsyncTokenBucket(config.GROQ_RPM)
+        self._groq_tokens = _AsyncTokenBucket(config.GROQ_TPM)
         
     def _get_api_key_for_model(self, model: str) -> Optional[str]:
         """
@@ -292,66 +403,16 @@ class LLMService:
         
         return None
 
-    def _build_system_prompt(self) -> str:
+    def _system_message(self, model: str) -> Dict[str, Any]:
         """
-        Build system prompt that instructs LLM to extract a flat array of items with line numbers.
-        No normalization, grouping, structure inference, or coordinate math - just raw extraction.
+        System message for a request. Anthropic models get the prompt as a content block marked
+        for prompt caching, so the unchanging prefix is not reprocessed on every document.
+        A fresh dict is returned each call because provider transforms may modify messages.
         """
-        # Build mapping synonyms section for the prompt
-        mapping_section = "**Field Mapping Synonyms (for reference):**\n\n"
-        mapping_section += "The following mappings help identify canonical field names. Use the exact source key as it appears in the document.\n\n"
-        for canonical_name, synonyms in CANONICAL_MAPPINGS.items():
-            mapping_section += f"- `{canonical_name}`: {', '.join(synonyms[:5])}"  # Show first 5 synonyms
-            if len(synonyms) > 5:
-                mapping_section += f", ... (and {len(synonyms) - 5} more)"
-            mapping_section += "\n"
-        mapping_section += "\n"
-        
-        return (
-            "You are an expert insurance document extraction AI. Your goal is to extract **ALL** visible data from the Loss Run Report.\n\n"
-            "**CRITICAL: Your role is ONLY to extract raw fields exactly as seen in the document.**\n\n"
-            "**STRICT RULES - YOU MUST FOLLOW THESE:**\n\n"
-            "1. Extract EVERY visible field/value from the document\n"
-            "2. Do NOT normalize keys (use exact labels as they appear)\n"
-            "3. Do NOT group claims or create nested structure\n"
-            "4. Do NOT invent structure or infer relationships\n"
-            "5. Do NOT skip columns or summarize data\n"
-            "6. Do NOT infer missing values\n"
-            "7. Do NOT guess line numbers - if unclear, skip the item\n\n"
-            + mapping_section +
-            "**Line Number References:**\n\n"
-            "- The raw text contains line numbers in square brackets (e.g., [15], [0x11])\n"
-            "- For each field, list ALL line numbers where that field's value appears\n"
-            "- Line numbers must match the [NN] markers in the text EXACTLY\n"
-            "- Multi-line values → include all line numbers (e.g., [15, 16, 17])\n"
-            "- If line numbers are unclear or missing → skip the item (do NOT guess)\n\n"
-            "**Output JSON Structure (MANDATORY):**\n\n"
-            "Return valid JSON with this EXACT structure:\n"
-            "{\n"
-            '  "items": [\n'
-            "    {\n"
-            '      "source_key": "Claimant Name",\n'
-            '      "value": "SYDIA",\n'
-            '      "line_numbers": [15, 16, 17]\n'
-            "    },\n"
-            "    {\n"
-            '      "source_key": "Claim Number",\n'
-            '      "value": "12345",\n'
-            '      "line_numbers": [12]\n'
-            "    }\n"
-            "  ]\n"
-            "}\n\n"
-            "**Requirements:**\n\n"
-            "- `items` is an array\n"
-            "- One object per extracted value\n"
-            "- `source_key` = exact label as it appears in document (use the original field name as seen)\n"
-            "- `value` = exact value as it appears (no transformation)\n"
-            "- `line_numbers` = array of integers matching [NN] markers exactly\n"
-            "- If a value exists, it MUST have line_numbers\n"
-            "- If line_numbers are unclear → skip the item (do NOT guess)\n"
-            "- Keep strictly to JSON. Do not add comments or extra keys.\n"
-            "- If a field is not present, omit it (do not include null values)."
-        )
+        if model.startswith(("claude-", "anthropic/")):
+            content = [{"type": "text", "text": self.system_prompt, "cache_control": {"type": "ephemeral"}}]
+            return {"role": "system", "content": content}
+        return {"role": "system", "content": self.system_prompt}
 
     async def structure_document(
         self, 
@@ -370,11 +431,11 @@ class LLMService:
         target_model = model_id if model_id else self.default_model
         api_key = self._get_api_key_for_model(target_model)
         
-        logger.info(f"[LLMService] Using model: {target_model}")
+        logger.info("[LLMService] Using model: %s", target_model)
         
         # Call LLM to extract items
         messages = [
-            {"role": "system", "content": self.system_prompt},
+            self._system_message(target_model),
             {
                 "role": "user",
                 "content": (
@@ -396,21 +457,27 @@ class LLMService:
         if api_key:
             kwargs["api_key"] = api_key
         
+        if target_model.startswith("groq/"):
+            # Rough prompt size estimate (~4 characters per token)
+            estimated_tokens = (len(self.system_prompt) + len(raw_text)) // 4
+            await self._groq_requests.acquire()
+            await self._groq_tokens.acquire(estimated_tokens)
+
         try:
             response = await litellm.acompletion(**kwargs)
             content = response["choices"][0]["message"]["content"]
         except Exception as e:
-            logger.error(f"LLM Call Failed for model {target_model}: {e}")
+            logger.error("LLM Call Failed for model %s: %s", target_model, e)
             raise
 
         try:
-            parsed = json.loads(content)
-        except json.JSONDecodeError:
+            parsed = orjson.loads(content)
+        except orjson.JSONDecodeError:
             # If the model returns leading/trailing text, try to salvage JSON payload.
             start = content.find("{")
             end = content.rfind("}")
             if start != -1 and end != -1 and end > start:
-                parsed = json.loads(content[start : end + 1])
+                parsed = orjson.loads(content[start : end + 1])
             else:
                 raise
 
@@ -436,12 +503,10 @@ class LLMService:
             # PRESERVE ALL ITEMS - even with empty keys/values (data loss prevention)
             # Use empty string for missing keys/values instead of skipping
             
-            # Convert line numbers to integers (handles hex, strings, etc.)
-            line_numbers = []
-            for line_val in line_numbers_raw:
-                converted = self._convert_line_number(line_val)
-                if converted is not None:
-                    line_numbers.append(converted)
+            # Convert line numbers to integers (handles hex, strings, etc.), deduplicating as we go
+            line_numbers = {
+                converted for converted in map(convert_line_number, line_numbers_raw) if converted is not None
+            }
             
             # If no valid line numbers, use empty array (preserve item, just no line refs)
             # This ensures no data loss - item is still included
@@ -454,11 +519,11 @@ class LLMService:
                 "source_key": source_key if source_key else "(no key)",
                 "canonical_name": canonical_name,
                 "value": value if value else "(no value)",
-                "line_numbers": sorted(list(set(line_numbers))) if line_numbers else []  # Deduplicate and sort
+                "line_numbers": sorted(line_numbers)  # Deduplicated above; empty set -> []
             })
         
         # No items are skipped - all items are preserved (data loss prevention)
-        logger.info(f"[LLMService] Extracted {len(items)} items (all preserved, no data loss)")
+        logger.info("[LLMService] Extracted %d items (all preserved, no data loss)", len(items))
         
         # Add semantic_type tags to all items (deterministic, dictionary-based)
         tagged_items = semantic_tagger.tag_items(items)
@@ -469,50 +534,8 @@ class LLMService:
         }
 
     def _convert_line_number(self, line_val: Any) -> Optional[int]:
-        """
-        Convert a line number to an integer, handling hex strings and other formats.
-        
-        Handles:
-        - Integers: returns as-is
-        - Hex strings: "2A" -> 42, "0x2A" -> 42
-        - Float integers: 2.0 -> 2
-        - String integers: "42" -> 42
-        
-        Returns None if conversion fails.
-        """
-        if isinstance(line_val, int):
-            return line_val if line_val >= 0 else None
-        
-        if isinstance(line_val, float):
-            # Check if it's effectively an integer
-            if line_val.is_integer() and line_val >= 0:
-                return int(line_val)
-            return None
-        
-        if isinstance(line_val, str):
-            line_str = line_val.strip()
-            # Try hex format (with or without 0x prefix)
-            if line_str.startswith("0x") or line_str.startswith("0X"):
-                try:
-                    return int(line_str, 16)
-                except ValueError:
-                    pass
-            # Try hex without prefix (e.g., "2A", "2C")
-            try:
-                # Check if it looks like hex (contains A-F)
-                if any(c in line_str.upper() for c in "ABCDEF"):
-                    return int(line_str, 16)
-            except ValueError:
-                pass
-            # Try regular integer
-            try:
-                val = int(line_str)
-                return val if val >= 0 else None
-            except ValueError:
-                pass
-        
-        return None
-
+        """Convert a line number to an integer (see line_numbers.convert_line_number)."""
+        return convert_line_number(line_val)
 
 
 llm_service = LLMService()
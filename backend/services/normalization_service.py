@@ -11,6 +11,11 @@ import re
 
 logger = logging.getLogger(__name__)
 
+# Label clean-up patterns, compiled once instead of on every normalize_field_label call
+_PARENTHETICAL_RE = re.compile(r'\([^)]*\)')
+_WHITESPACE_RE = re.compile(r'\s+')
+_PUNCTUATION_RE = re.compile(r'[:;.,\-_]+')
+
 
 # Synonym dictionaries: maps raw labels (case-insensitive) to canonical keys
 FIELD_SYNONYMS: Dict[str, str] = {
@@ -121,14 +126,15 @@ def normalize_field_label(raw_label: str) -> Tuple[Optional[str], float, str]:
     original_normalized = normalized
     
     # Step 2: Remove parenthetical text (e.g., "(USD)", "(per claim)")
-    normalized = re.sub(r'\([^)]*\)', '', normalized).strip()
+    if "(" in normalized:
+        normalized = _PARENTHETICAL_RE.sub('', normalized).strip()
     
     # Step 3: Collapse whitespace (multiple spaces to single space)
-    normalized = re.sub(r'\s+', ' ', normalized).strip()
+    normalized = _WHITESPACE_RE.sub(' ', normalized).strip()
     
     # Step 4: Remove punctuation (colons, periods, dashes, etc.)
-    normalized = re.sub(r'[:;.,\-_]+', ' ', normalized).strip()
-    normalized = re.sub(r'\s+', ' ', normalized).strip()  # Collapse again after punctuation removal
+    normalized = _PUNCTUATION_RE.sub(' ', normalized).strip()
+    normalized = _WHITESPACE_RE.sub(' ', normalized).strip()  # Collapse again after punctuation removal
     
     # Step 5: Direct lookup (exact match - highest confidence)
     canonical = FIELD_SYNONYMS.get(normalized)
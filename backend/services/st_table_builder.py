@@ -72,6 +72,12 @@ ST_CANONICAL_FIELDS: List[str] = [
     "sheetName",
 ]
 
+# Overflow slots tried after each base key ("medicalPaid" -> "medicalPaid2" ... "medicalPaid6"),
+# built once instead of formatting the names on every assignment
+_NUMBERED_KEYS: Dict[str, Tuple[str, ...]] = {
+    base_key: tuple(f"{base_key}{n}" for n in range(2, 7)) for base_key in ST_CANONICAL_FIELDS
+}
+
 
 def _empty_field(canonical_name: str) -> Dict[str, Any]:
     """
@@ -151,8 +157,8 @@ def _assign_field_to_row(row: Dict[str, Any], base_key: str, item: Dict[str, Any
         return
 
     # Try numbered variants: baseKey2 ... baseKey6
-    for n in range(2, 7):
-        numbered = f"{base_key}{n}"
+    numbered_keys = _NUMBERED_KEYS.get(base_key) or tuple(f"{base_key}{n}" for n in range(2, 7))
+    for numbered in numbered_keys:
         if numbered in row:
             current = row[numbered]
             if is_empty_field(current):
@@ -202,9 +208,12 @@ def build_st_rows(items: List[Dict[str, Any]], debug: bool = False) -> Tuple[Lis
     debug_info["claim_anchors_found"] = len(claim_items)
     
     if debug:
-        logger.info(f"[STBuilder] Found {len(claim_items)} claim anchors from {len(items)} total items")
-        for idx, anchor in enumerate(claim_items):
-            logger.debug(f"[STBuilder] Claim anchor {idx+1}: {anchor.get('value')} at lines {anchor.get('line_numbers')}")
+        logger.info("[STBuilder] Found %d claim anchors from %d total items", len(claim_items), len(items))
+        if logger.isEnabledFor(logging.DEBUG):
+            for idx, anchor in enumerate(claim_items):
+                logger.debug(
+                    "[STBuilder] Claim anchor %d: %s at lines %s", idx + 1, anchor.get("value"), anchor.get("line_numbers")
+                )
 
     if not claim_items:
         debug_info["validation_issues"].append("No claim number items found - cannot build ST rows")
@@ -381,9 +390,12 @@ def build_st_rows(items: List[Dict[str, Any]], debug: bool = False) -> Tuple[Lis
     debug_info["validation_issues"].extend(validation_issues)
 
     if debug:
-        logger.info(f"[STBuilder] Built {len(rows)} rows, assigned {debug_info['items_assigned']} items, {len(debug_info['items_unassigned'])} unassigned")
+        logger.info(
+            "[STBuilder] Built %d rows, assigned %d items, %d unassigned",
+            len(rows), debug_info["items_assigned"], len(debug_info["items_unassigned"]),
+        )
         if validation_issues:
-            logger.warning(f"[STBuilder] Found {len(validation_issues)} validation issues")
+            logger.warning("[STBuilder] Found %d validation issues", len(validation_issues))
 
     return rows, debug_info
 
@@ -3,10 +3,33 @@ import httpx
 import os
 from backend.config import config
 
+try:
+    import h2  # noqa: F401  (enables HTTP/2 in httpx)
+    _HTTP2_AVAILABLE = True
+except ImportError:
+    _HTTP2_AVAILABLE = False
+
+# Connection pool shared by all LLMWhisperer calls (status polling hits the same host every second)
+_POOL_LIMITS = httpx.Limits(max_keepalive_connections=16, max_connections=32)
+
+
 class WhisperClient:
     def __init__(self):
         self.base_url = config.LLMWHISPERER_BASE_URL_V2
         self.api_key = config.LLMWHISPERER_API_KEY
+        self._client = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """Shared client, created on first use so keep-alive connections are reused across requests."""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(http2=_HTTP2_AVAILABLE, limits=_POOL_LIMITS)
+        return self._client
+
+    async def aclose(self):
+        """Close the shared client (called on app shutdown)."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
     
     def _get_headers(self):
         return {
@@ -42,20 +65,19 @@ class WhisperClient:
         
         headers["Content-Type"] = "application/octet-stream"
 
-        async with httpx.AsyncClient() as client:
-            with open(file_path, "rb") as f:
-                file_content = f.read()
-                
-            response = await client.post(
-                url, 
-                headers=headers, 
-                params=params,
-                content=file_content,
-                timeout=120.0
-            )
-            response.raise_for_status()
-            # Expecting 202 Accepted
-            return response.json()
+        with open(file_path, "rb") as f:
+            file_content = f.read()
+            
+        response = await self._get_client().post(
+            url, 
+            headers=headers, 
+            params=params,
+            content=file_content,
+            timeout=120.0
+        )
+        response.raise_for_status()
+        # Expecting 202 Accepted
+        return response.json()
 
     async def get_status(self, whisper_hash: str):
         """
@@ -64,10 +86,9 @@ class WhisperClient:
         """
         url = f"{self.base_url}/whisper-status"
         params = {"whisper_hash": whisper_hash}
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, headers=self._get_headers(), params=params, timeout=30.0)
-            response.raise_for_status()
-            return response.json()
+        response = await self._get_client().get(url, headers=self._get_headers(), params=params, timeout=30.0)
+        response.raise_for_status()
+        return response.json()
 
     async def get_result(self, whisper_hash: str):
         """
@@ -76,13 +97,12 @@ class WhisperClient:
         """
         url = f"{self.base_url}/whisper-retrieve"
         params = {"whisper_hash": whisper_hash}
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, headers=self._get_headers(), params=params, timeout=60.0)
-            # 404 means not processed yet or invalid hash
-            # 200 means success
-            if response.status_code == 200:
-                return response.json()
-            else:
-                response.raise_for_status()
+        response = await self._get_client().get(url, headers=self._get_headers(), params=params, timeout=60.0)
+        # 404 means not processed yet or invalid hash
+        # 200 means success
+        if response.status_code == 200:
+            return response.json()
+        else:
+            response.raise_for_status()
 
 whisper_client = WhisperClient()